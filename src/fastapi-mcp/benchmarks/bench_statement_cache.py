@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for the SQLiteDB statement cache.
+
+Runs the CRUD calls of the users endpoints against an in-memory database, once the way
+SQLiteDB used to work (SQL rebuilt and every identifier re-validated against a freshly
+built whitelist on each call) and once with the statement cache, and reports the time per
+call and the cost of building the SQL text alone.
+
+Run from src/fastapi-mcp:
+    python benchmarks/bench_statement_cache.py --number 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import db_crud
+from src.db_crud import Lt, SQLiteDB, StartsWith, StatementCache
+
+def legacy_quoted_ident(name: str) -> str:
+    # Identifier check as it was before the whitelist was precomputed
+    if not isinstance(name, str) or not name or any(c in name for c in "\"'`;"):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$.")
+    if not set(name) <= allowed:
+        raise ValueError(f"Invalid identifier characters in: {name!r}")
+    return f'"{name}"'
+
+def make_db(statements) -> SQLiteDB:
+    db = SQLiteDB(":memory:", statements=statements)
+    db.create_table(
+        "users",
+        columns={"id": "INTEGER", "email": "TEXT NOT NULL", "name": "TEXT", "phone": "TEXT NOT NULL",
+                 "city": "TEXT", "state": "TEXT", "country": "TEXT"},
+        primary_key="id",
+        uniques=[["email"], ["phone"]],
+        indexes=["name", "city"],
+    )
+    db.insert_many("users", [
+        {"email": f"u{i}@example.com", "name": f"User {i}", "phone": str(i), "city": f"C{i % 20}",
+         "state": "S", "country": "US"}
+        for i in range(1000)
+    ])
+    return db
+
+def cases(db: SQLiteDB) -> dict:
+    counter = iter(range(10**9))
+    return {
+        "get_user": lambda: db.select("users", where={"id": 500}),
+        "list_users (filters)": lambda: db.select(
+            "users", where={"city": "C3", "name": StartsWith("User 1")}, order_by='"id" DESC', limit=20, offset=0
+        ),
+        "list_users_page": lambda: db.select("users", where={"id": Lt(900)}, order_by='"id" DESC', limit=21),
+        "update_user": lambda: db.update("users", {"city": "C1", "state": "S"}, where={"id": 10}),
+        "create_user": lambda: db.insert(
+            "users", {"email": f"n{next(counter)}@example.com", "phone": f"p{next(counter)}"}, returning="*"
+        ),
+    }
+
+def build_only(db: SQLiteDB) -> dict:
+    # Only the SQL text: what a cache hit saves on every call
+    where = {"city": "C3", "name": StartsWith("User 1")}
+    key = ("select", "users", "*", (("city", "="), ("name", (StartsWith, "range"))), '"id" DESC', True, True)
+    return {
+        "build select sql": lambda: db._select_sql("users", "*", where, '"id" DESC', 20, 0),
+        "cached select sql": lambda: db.statements.get(
+            key, lambda: db._select_sql("users", "*", where, '"id" DESC', 20, 0)
+        ),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def best(func) -> float:
+        return min(timeit.repeat(func, repeat=args.repeat, number=args.number)) / args.number * 1e6
+
+    cached = make_db(StatementCache())
+    uncached_cases = cases(make_db(StatementCache(maxsize=0)))
+    cached_cases = cases(cached)
+
+    quoted_ident = db_crud._quoted_ident
+    db_crud._quoted_ident = legacy_quoted_ident
+    try:
+        before = {name: best(func) for name, func in uncached_cases.items()}
+    finally:
+        db_crud._quoted_ident = quoted_ident
+    after = {name: best(func) for name, func in cached_cases.items()}
+
+    print(f"best of {args.repeat} x {args.number} calls, microseconds per call")
+    print(f"{'case':<24}{'before':>10}{'after':>10}{'saved':>10}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>10.2f}{after[name]:>10.2f}{before[name] - after[name]:>10.2f}")
+    for name, func in build_only(cached).items():
+        print(f"{name:<24}{best(func):>10.2f}")
+
+if __name__ == "__main__":
+    main()
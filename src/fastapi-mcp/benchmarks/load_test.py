@@ -0,0 +1,296 @@
+"""
+Load test for the users endpoints, over REST and over the mounted MCP endpoint.
+
+Seeds a copy of database/customer_database.db with --users users, then drives create_user,
+list_users, get_user and update_user in-process (httpx ASGI transport, no network) with
+--concurrency requests in flight, and prints p50/p95/p99 latency and requests per second per
+transport and operation as JSON. Save a run with --output and pass it as --baseline to a later
+run to get the relative change of every number; the exit code is 1 if any p95 or RPS regressed
+by more than --max-regression.
+
+Run from src/fastapi-mcp:
+    python benchmarks/load_test.py --users 10000 --requests 2000 --concurrency 32 --output before.json
+    python benchmarks/load_test.py --users 10000 --requests 2000 --concurrency 32 --baseline before.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+OPERATIONS = ["create_user", "list_users", "get_user", "update_user"]
+TRANSPORTS = ["rest", "mcp"]
+SEED_BATCH = 1000
+
+class McpSession:
+    """
+    Minimal MCP client for the streamable HTTP endpoint: initialize once, then tools/call.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, path: str = "/mcp"):
+        self.client = client
+        self.path = path
+        self.headers = {"Accept": "application/json, text/event-stream"}
+        self.ids = itertools.count(1)
+
+    async def _post(self, message: dict) -> httpx.Response:
+        response = await self.client.post(self.path, json=message, headers=self.headers)
+        response.raise_for_status()
+        return response
+
+    async def initialize(self) -> None:
+        response = await self._post({
+            "jsonrpc": "2.0",
+            "id": next(self.ids),
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {},
+                "clientInfo": {"name": "load-test", "version": "1"},
+            },
+        })
+        session_id = response.headers.get("mcp-session-id")
+        if session_id:
+            self.headers["mcp-session-id"] = session_id
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def call_tool(self, name: str, arguments: dict) -> bool:
+        """
+        Calls a tool and returns whether it succeeded.
+        """
+        response = await self._post({
+            "jsonrpc": "2.0",
+            "id": next(self.ids),
+            "method": "tools/call",
+            "params": {"name": name, "arguments": arguments},
+        })
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            data = [line[5:] for line in response.text.splitlines() if line.startswith("data:")]
+            message = json.loads(data[-1])
+        else:
+            message = response.json()
+        return "result" in message and not message["result"].get("isError", False)
+
+class Workload:
+    """
+    Arguments for each operation. Users are numbered: the first `users` are seeded, create_user
+    adds the next ones. Reads and updates pick random seeded users.
+    """
+
+    def __init__(self, users: int, seed: int):
+        self.user_ids = []
+        self.random = random.Random(seed)
+        self.created = itertools.count(users)
+
+    def new_user(self, index: int) -> dict:
+        return {
+            "email": f"load-user-{index}@example.com",
+            "name": f"Load User {index}",
+            "phone": 7_000_000_000 + index,
+            "city": f"City {index % 50}",
+            "state": "ST",
+            "country": "US",
+        }
+
+    def arguments(self, operation: str) -> dict:
+        if operation == "create_user":
+            return {"payload": self.new_user(next(self.created))}
+        if operation == "list_users":
+            return {"limit": 20, "offset": self.random.randrange(0, max(len(self.user_ids) - 20, 1))}
+        user_id = self.random.choice(self.user_ids)
+        if operation == "get_user":
+            return {"user_id": user_id}
+        return {"user_id": user_id, "payload": {"city": f"City {self.random.randrange(50)}"}}
+
+async def rest_call(client: httpx.AsyncClient, operation: str, arguments: dict) -> bool:
+    if operation == "create_user":
+        response = await client.post("/users", json=arguments["payload"])
+    elif operation == "list_users":
+        response = await client.get("/users", params=arguments)
+    elif operation == "get_user":
+        response = await client.get(f"/users/{arguments['user_id']}")
+    else:
+        response = await client.patch(f"/users/{arguments['user_id']}", json=arguments["payload"])
+    return response.is_success
+
+async def mcp_call(session: McpSession, operation: str, arguments: dict) -> bool:
+    if operation == "create_user":
+        # fastapi-mcp exposes the request body fields as top-level tool arguments
+        arguments = arguments["payload"]
+    elif operation == "update_user":
+        arguments = {"user_id": arguments["user_id"], **arguments["payload"]}
+    return await session.call_tool(operation, arguments)
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+async def drive(call, workload: Workload, operation: str, requests: int, concurrency: int) -> dict:
+    """
+    Runs `requests` calls of one operation with `concurrency` workers and summarizes the latencies.
+    """
+    remaining = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while next(remaining) < requests:
+            arguments = workload.arguments(operation)
+            start = time.perf_counter()
+            try:
+                ok = await call(operation, arguments)
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / max(len(latencies), 1) * 1000, 3),
+    }
+
+async def seed(client: httpx.AsyncClient, workload: Workload, users: int) -> list:
+    # Through init_db and bulk_create_users, so the search index and change counter are kept up to date
+    response = await client.post("/init-db")
+    response.raise_for_status()
+    ids = []
+    for start in range(0, users, SEED_BATCH):
+        batch = [workload.new_user(i) for i in range(start, min(start + SEED_BATCH, users))]
+        response = await client.post("/users:bulk", json=batch)
+        response.raise_for_status()
+        ids.extend(user["id"] for user in response.json()["users"])
+    return ids
+
+async def run(args) -> dict:
+    # main reads its configuration from the environment at import time
+    import main
+
+    workload = Workload(args.users, args.seed)
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {"Authorization": f"Bearer {os.environ['API_BEARER_TOKEN']}"}
+    results = {}
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", headers=headers,
+                                     timeout=60) as client:
+            started = time.perf_counter()
+            workload.user_ids = await seed(client, workload, args.users)
+            seed_seconds = time.perf_counter() - started
+
+            for name in args.transports:
+                if name == "mcp":
+                    session = McpSession(client)
+                    await session.initialize()
+                    call = lambda operation, arguments: mcp_call(session, operation, arguments)
+                else:
+                    call = lambda operation, arguments: rest_call(client, operation, arguments)
+                results[name] = {}
+                for operation in args.operations:
+                    if args.warmup:
+                        await drive(call, workload, operation, args.warmup, args.concurrency)
+                    results[name][operation] = await drive(
+                        call, workload, operation, args.requests, args.concurrency
+                    )
+    return {
+        "config": {
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "db_executor": os.getenv("DB_EXECUTOR", "thread"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "results": results,
+    }
+
+def compare(report: dict, baseline: dict, max_regression: float) -> bool:
+    """
+    Adds the relative change against the baseline to every result and returns False if any
+    p95 latency rose, or RPS fell, by more than max_regression.
+    """
+    ok = True
+    for transport, operations in report["results"].items():
+        for operation, stats in operations.items():
+            before = baseline.get("results", {}).get(transport, {}).get(operation)
+            if not before:
+                continue
+            change = {}
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                if before.get(key):
+                    change[key] = round(stats[key] / before[key] - 1, 3)
+            stats["change"] = change
+            if change.get("p95_ms", 0) > max_regression or change.get("rps", 0) < -max_regression:
+                stats["regressed"] = True
+                ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000, help="users to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per operation")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per operation")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=TRANSPORTS)
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the chosen users")
+    parser.add_argument("--source-db", default=os.path.join(ROOT, "database", "customer_database.db"),
+                        help="database copied before seeding; it is never modified")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed relative p95 increase / RPS decrease against the baseline")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="fastapi-mcp-load-")
+    try:
+        db_path = os.path.join(workdir, "customer_database.db")
+        if os.path.exists(args.source_db):
+            shutil.copyfile(args.source_db, db_path)
+        os.environ["DB_PATH"] = db_path
+        os.environ.setdefault("API_BEARER_TOKEN", secrets.token_urlsafe(16))
+        report = asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ok = True
+    if args.baseline:
+        with open(args.baseline) as f:
+            ok = compare(report, json.load(f), args.max_regression)
+        report["baseline"] = args.baseline
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,31 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, Security
-from pydantic import BaseModel, EmailStr
-from typing import Generator, Optional, List
+from fastapi import FastAPI, HTTPException, Query, Depends, Request, Response, Security
+from pydantic import BaseModel, EmailStr, TypeAdapter
+from typing import AsyncIterator, Awaitable, Callable, Optional, List
+from contextlib import asynccontextmanager
+import anyio
+import base64
+import binascii
 import uvicorn
 import sqlite3
 import os
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from src.db_crud import SQLiteDB
+from src.db_async import AsyncSQLiteDB, InlineExecutor, db_executor
+from src.db_crud import Lt, SQLiteConnectionPool, SQLiteDB, StartsWith
+from src.response_cache import etag_matches, make_etag, response_cache
+
+DB_PATH = os.getenv("DB_PATH", "database/customer_database.db")
+
+# "thread": SQLite calls run on dedicated DB threads; "threadpool": on the shared anyio threadpool;
+# "sync": inline on the event loop, one request at a time (no thread hops, for a single client)
+DB_EXECUTOR = os.getenv("DB_EXECUTOR", "thread")
+
+# Secondary indexes for the lookups agents make through list_users
+USERS_INDEXES = ["name", "city", "state", "country"]
+
+# Columns of the users full-text index, and their bm25 weights in search_users
+USERS_SEARCH_COLUMNS = ["name", "email", "city", "state", "country"]
+USERS_SEARCH_WEIGHTS = [10.0, 5.0, 3.0, 2.0, 1.0]
 
 security = HTTPBearer(auto_error=False)
 
@@ -17,10 +36,58 @@ def verify_bearer(credentials: HTTPAuthorizationCredentials = Security(security)
     if not expected or credentials.credentials != expected:
         raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
 
-app = FastAPI(title="Database operations Server", dependencies=[Depends(verify_bearer)])
+def ensure_indexes(pool: SQLiteConnectionPool) -> None:
+    # Databases created before the indexes, search index and change counter existed get them on startup
+    with SQLiteDB(DB_PATH, pool=pool) as db:
+        if db.table_exists("users"):
+            db.ensure_indexes("users", USERS_INDEXES)
+            db.ensure_fts("users", USERS_SEARCH_COLUMNS)
+            db.ensure_change_counter("users")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    threads = int(os.getenv("DB_THREADS", "0")) or int(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    # Writes are serialized by a single slot (SQLite has one writer), so one write connection suffices
+    size = int(os.getenv("DB_POOL_SIZE", "0")) or 1
+    read_size = int(os.getenv("DB_READ_POOL_SIZE", "0")) or threads
+    app.state.db_pool = SQLiteConnectionPool(DB_PATH, size=size)
+    # Switches the database to WAL before any read-only connection is opened
+    await anyio.to_thread.run_sync(ensure_indexes, app.state.db_pool)
+    app.state.db_read_pool = SQLiteConnectionPool(DB_PATH, size=read_size, read_only=True)
+    app.state.db_write_slots = anyio.Semaphore(1)
+    app.state.db_read_slots = anyio.Semaphore(read_size)
+    if DB_EXECUTOR == "thread":
+        app.state.db_writer = db_executor(1, "sqlite-writer")
+        app.state.db_readers = db_executor(threads, "sqlite-reader")
+    elif DB_EXECUTOR == "sync":
+        app.state.db_writer = app.state.db_readers = InlineExecutor()
+    else:
+        app.state.db_writer = app.state.db_readers = None
+    try:
+        yield
+    finally:
+        for executor in (app.state.db_writer, app.state.db_readers):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        app.state.db_read_pool.close()
+        app.state.db_pool.close()
+
+app = FastAPI(title="Database operations Server", dependencies=[Depends(verify_bearer)], lifespan=lifespan)
+
+async def get_db(request: Request) -> AsyncIterator[AsyncSQLiteDB]:
+    # One transaction and one commit per request
+    state = request.app.state
+    async with AsyncSQLiteDB(
+        DB_PATH, pool=state.db_pool, unit_of_work=True, executor=state.db_writer, slots=state.db_write_slots
+    ) as db:
+        yield db
 
-def get_db() -> Generator[SQLiteDB, None, None]:
-    with SQLiteDB("database/customer_database.db") as db:
+async def get_read_db(request: Request) -> AsyncIterator[AsyncSQLiteDB]:
+    # Read-only connections: never wait for the write lock and cannot modify the database
+    state = request.app.state
+    async with AsyncSQLiteDB(
+        DB_PATH, pool=state.db_read_pool, executor=state.db_readers, slots=state.db_read_slots
+    ) as db:
         yield db
 
 class UserCreate(BaseModel):
@@ -48,15 +115,87 @@ class UserOut(BaseModel):
     state: Optional[str] = None
     country: Optional[str] = None
 
+class BulkInsertedUser(BaseModel):
+    index: int
+    id: int
+
+class BulkInsertOut(BaseModel):
+    ok: bool
+    inserted: int
+    users: List[BulkInsertedUser]
+
+class UserPage(BaseModel):
+    items: List[UserOut]
+    next_cursor: Optional[str] = None
+
+class UserSearchPage(BaseModel):
+    items: List[UserOut]
+    next_offset: Optional[int] = None
+
+user_json = TypeAdapter(UserOut)
+users_json = TypeAdapter(List[UserOut])
+
+async def cached_json(
+    request: Request, db: AsyncSQLiteDB, table: str, build: Callable[[], Awaitable[bytes]]
+) -> Response:
+    """
+    Serves a JSON response that only depends on `table`. Its ETag combines the table version with
+    the request path and query. 304 if the client already has this version, else the body from
+    the response cache or build(). build() raising (e.g. 404) wins over a matching If-None-Match.
+    """
+    # Read the version before the data, so a body is never tagged with a newer version than it reflects
+    version = await db.table_version(table)
+    if version is None:
+        return Response(await build(), media_type="application/json")
+    key = (request.url.path, request.url.query)
+    etag = make_etag(table, version, f"{request.url.path}?{request.url.query}")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # A cached body proves the resource exists at this version; otherwise build() checks it
+    body = response_cache.get(table, key, version)
+    if body is None:
+        body = await build()
+        response_cache.set(table, key, version, body)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, last_id = text.partition(":")
+        if prefix != "id":
+            raise ValueError(text)
+        return int(last_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def user_filters(email, name, name_prefix, phone, city, state, country) -> dict:
+    where = {}
+    if email is not None:
+        where["email"] = str(email)
+    if name is not None:
+        where["name"] = name
+    elif name_prefix is not None:
+        where["name"] = StartsWith(name_prefix)
+    if phone is not None:
+        where["phone"] = phone
+    for column, value in (("city", city), ("state", state), ("country", country)):
+        if value is not None:
+            where[column] = value
+    return where
+
 @app.post("/init-db", operation_id="init_db")
-def init_db(db: SQLiteDB = Depends(get_db)):
+async def init_db(db: AsyncSQLiteDB = Depends(get_db)):
     """
     Initialize the database and create the users table if it doesn't exist.
     :return: A dictionary indicating whether the table was created.
     """
     created = False
-    if not db.table_exists("users"):
-        db.create_table(
+    if not await db.table_exists("users"):
+        await db.create_table(
             "users",
             columns={
                 "id": "INTEGER", 
@@ -69,19 +208,22 @@ def init_db(db: SQLiteDB = Depends(get_db)):
             },
             primary_key="id",
             uniques=[["email"], ["phone"]],
+            indexes=USERS_INDEXES,
         )
+        await db.ensure_fts("users", USERS_SEARCH_COLUMNS)
+        await db.ensure_change_counter("users")
         created = True
     return {"ok": True, "created": created}
 
 @app.post("/users", response_model=UserOut, status_code=201, operation_id="create_user")
-def create_user(payload: UserCreate, db: SQLiteDB = Depends(get_db)):
+async def create_user(payload: UserCreate, db: AsyncSQLiteDB = Depends(get_db)):
     """
     Create a new user.
     :param payload: The user data to create the user. Example: {"name": "John Doe", "email": "john@example.com", "phone": 1234567890, "city": "New York", "state": "NY", "country": "USA"}
     :return: The created user as a UserOut model.
     """
     try:
-        user_id = db.insert(
+        user = await db.insert(
             "users", 
             {
                 "email": payload.email, 
@@ -90,55 +232,143 @@ def create_user(payload: UserCreate, db: SQLiteDB = Depends(get_db)):
                 "city": payload.city, 
                 "state": payload.state, 
                 "country": payload.country
-            }
+            },
+            returning="*",
         )
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=409, detail="Email/Phone number already exists")
-    rows = db.select("users", where={"id": user_id})
-    return rows[0]
+    response_cache.invalidate("users")
+    return user
+
+@app.post("/users:bulk", response_model=BulkInsertOut, status_code=201, operation_id="bulk_create_users")
+async def bulk_create_users(
+    payload: List[UserCreate],
+    skip_existing: bool = Query(default=False),
+    db: AsyncSQLiteDB = Depends(get_db)
+):
+    """
+    Create many users in one transaction.
+    :param payload: A list of users to create, each like the create_user payload.
+    :param skip_existing: Skip users whose email or phone number already exists instead of failing the whole batch.
+    :return: The number of users created, and for each created user its position in the payload and its ID.
+    """
+    users = [user.model_dump() for user in payload]
+    try:
+        rows = await db.insert_many("users", users, or_ignore=skip_existing, returning=["id", "email"])
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=409, detail="Email/Phone number already exists")
+    response_cache.invalidate("users")
+    # RETURNING rows come in no particular order and skipped users are missing; emails are unique
+    index_by_email = {}
+    for index, user in enumerate(users):
+        index_by_email.setdefault(user["email"], index)
+    created = sorted(({"index": index_by_email[row["email"]], "id": row["id"]} for row in rows), key=lambda user: user["index"])
+    return {"ok": True, "inserted": len(created), "users": created}
 
 @app.get("/users", response_model=List[UserOut], operation_id="list_users")
-def list_users(
+async def list_users(
+    request: Request,
     email: Optional[EmailStr] = Query(default=None),
     name: Optional[str] = Query(default=None),
+    name_prefix: Optional[str] = Query(default=None, min_length=1),
     phone: Optional[int] = Query(default=None),
+    city: Optional[str] = Query(default=None),
+    state: Optional[str] = Query(default=None),
+    country: Optional[str] = Query(default=None),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
-    db: SQLiteDB = Depends(get_db)
+    db: AsyncSQLiteDB = Depends(get_read_db)
 ):
     """
     List users with optional filtering by email and name, and pagination support.
     :param email: Optional email to filter users.
     :param name: Optional name to filter users.
+    :param name_prefix: Optional case-sensitive prefix of the name, e.g. "Jo" matches "John".
     :param phone: Optional phone number to filter users.
+    :param city: Optional city to filter users.
+    :param state: Optional state to filter users.
+    :param country: Optional country to filter users.
     :param limit: Maximum number of users to return (default is 100, max is 1000).
     :param offset: Number of users to skip (default is 0). 
     :return: A list of users matching the criteria.
     """
-    where = {}
-    if email is not None:
-        where["email"] = str(email)
-    if name is not None:
-        where["name"] = name
-    if phone is not None:
-        where["phone"] = phone
-    
-    return db.select("users", where=where or None, order_by='"id" DESC', limit=limit, offset=offset)
+    where = user_filters(email, name, name_prefix, phone, city, state, country)
+
+    async def build() -> bytes:
+        rows = await db.select("users", where=where or None, order_by='"id" DESC', limit=limit, offset=offset)
+        return users_json.dump_json(users_json.validate_python(rows))
+    return await cached_json(request, db, "users", build)
+
+@app.get("/users:page", response_model=UserPage, operation_id="list_users_page")
+async def list_users_page(
+    email: Optional[EmailStr] = Query(default=None),
+    name: Optional[str] = Query(default=None),
+    name_prefix: Optional[str] = Query(default=None, min_length=1),
+    phone: Optional[int] = Query(default=None),
+    city: Optional[str] = Query(default=None),
+    state: Optional[str] = Query(default=None),
+    country: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None),
+    db: AsyncSQLiteDB = Depends(get_read_db)
+):
+    """
+    List users page by page, newest first. Prefer this over list_users with offset to walk many users.
+    :param email: Optional email to filter users.
+    :param name: Optional name to filter users.
+    :param name_prefix: Optional case-sensitive prefix of the name, e.g. "Jo" matches "John".
+    :param phone: Optional phone number to filter users.
+    :param city: Optional city to filter users.
+    :param state: Optional state to filter users.
+    :param country: Optional country to filter users.
+    :param limit: Maximum number of users to return (default is 100, max is 1000).
+    :param cursor: The next_cursor of the previous page; omit it for the first page.
+    :return: The users of this page and the cursor of the next page (null on the last page).
+    """
+    where = user_filters(email, name, name_prefix, phone, city, state, country)
+    if cursor is not None:
+        # Seek past the previous page through the primary key instead of skipping rows
+        where["id"] = Lt(decode_cursor(cursor))
+
+    rows = await db.select("users", where=where or None, order_by='"id" DESC', limit=limit + 1)
+    next_cursor = encode_cursor(rows[limit - 1]["id"]) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+@app.get("/users:search", response_model=UserSearchPage, operation_id="search_users")
+async def search_users(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSQLiteDB = Depends(get_read_db)
+):
+    """
+    Search users by words or word prefixes in their name, email, city, state or country, best matches first.
+    Use this to find users from partial information instead of listing all users.
+    :param q: Search text, e.g. "jo pune" finds users with a word starting with "jo" and one starting with "pune".
+    :param limit: Maximum number of users to return (default is 20, max is 100).
+    :param offset: Number of matches to skip; pass the next_offset of the previous page.
+    :return: The matching users of this page and the offset of the next page (null on the last page).
+    """
+    rows = await db.search("users", q, weights=USERS_SEARCH_WEIGHTS, limit=limit + 1, offset=offset)
+    next_offset = offset + limit if len(rows) > limit else None
+    return {"items": rows[:limit], "next_offset": next_offset}
 
 @app.get("/users/{user_id}", response_model=UserOut, operation_id="get_user")
-def get_user(user_id: int, db: SQLiteDB = Depends(get_db)):
+async def get_user(user_id: int, request: Request, db: AsyncSQLiteDB = Depends(get_read_db)):
     """
     Get a user by ID.
     :param user_id: The ID of the user to retrieve.
     :return: The user as a UserOut model.
     """
-    rows = db.select("users", where={"id": user_id})
-    if not rows:
-        raise HTTPException(status_code=404, detail="User not found")
-    return rows[0]
+    async def build() -> bytes:
+        rows = await db.select("users", where={"id": user_id})
+        if not rows:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user_json.dump_json(user_json.validate_python(rows[0]))
+    return await cached_json(request, db, "users", build)
 
 @app.patch("/users/{user_id}", response_model=UserOut, operation_id="update_user")
-def update_user(user_id: int, payload: UserUpdate, db: SQLiteDB = Depends(get_db)):
+async def update_user(user_id: int, payload: UserUpdate, db: AsyncSQLiteDB = Depends(get_db)):
     """
     Update a user by ID.
     :param user_id: The ID of the user to update.
@@ -151,24 +381,25 @@ def update_user(user_id: int, payload: UserUpdate, db: SQLiteDB = Depends(get_db
     if "email" in data:
         data["email"] = str(data["email"])
     try:
-        updated = db.update("users", data, where={"id": user_id})
+        rows = await db.update("users", data, where={"id": user_id}, returning="*")
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=409, detail="Email already exists")
-    if updated == 0:
+    if not rows:
         raise HTTPException(status_code=404, detail="User not found")
-    rows = db.select("users", where={"id": user_id})
+    response_cache.invalidate("users")
     return rows[0]
 
 @app.delete("/users/{user_id}", operation_id="delete_user")
-def delete_user(user_id: int, db: SQLiteDB = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSQLiteDB = Depends(get_db)):
     """
     Delete a user by ID.
     :param user_id: The ID of the user to delete.
     :return: A dictionary indicating whether the user was deleted.
     """
-    deleted = db.delete("users", where={"id": user_id})
+    deleted = await db.delete("users", where={"id": user_id})
     if deleted == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    response_cache.invalidate("users")
     return {"ok": True, "deleted": deleted}
 
 from fastapi_mcp import FastApiMCP, AuthConfig
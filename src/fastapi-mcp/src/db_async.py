@@ -0,0 +1,142 @@
+#
+# Async front of the SQLite helper, for async def endpoints.
+
+import asyncio
+import functools
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+import anyio
+
+from .db_crud import SQLiteConnectionPool, SQLiteDB, StatementCache
+
+def _on_db_thread(name: str) -> Callable[..., Any]:
+    # Coroutine version of a SQLiteDB method, run where AsyncSQLiteDB runs blocking calls
+    method = getattr(SQLiteDB, name)
+
+    @functools.wraps(method)
+    async def call(self: "AsyncSQLiteDB", *args: Any, **kwargs: Any) -> Any:
+        return await self._call(getattr(self.db, name), *args, **kwargs)
+
+    return call
+
+def db_executor(threads: int, name: str = "sqlite") -> ThreadPoolExecutor:
+    """
+    Dedicated DB threads for AsyncSQLiteDB: calls queue for them instead of for the threadpool
+    that runs sync endpoints and dependencies.
+    """
+    return ThreadPoolExecutor(max_workers=threads, thread_name_prefix=name)
+
+class InlineExecutor(Executor):
+    """
+    Runs each call right away in the calling thread, i.e. on the event loop, so SQLite is used
+    as plain sync code. No thread hop per call, but a slow statement stalls every request.
+    """
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+class AsyncSQLiteDB:
+    """
+    Async counterpart of SQLiteDB with the same CRUD/DDL methods, as coroutines.
+    The blocking sqlite3 calls run on `executor` (see db_executor), or in anyio's default
+    threadpool when executor is None; the event loop itself never waits on SQLite, unless
+    executor is an InlineExecutor.
+
+    slots, if given, is held from __aenter__ to __aexit__. Use one slot per pooled connection so
+    that waiting for a connection happens on the event loop rather than on a DB thread, and a
+    single slot for the write pool so that in-process writers queue here instead of blocking DB
+    threads on SQLite's write lock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        pool: Optional[SQLiteConnectionPool] = None,
+        unit_of_work: bool = False,
+        statements: Optional[StatementCache] = None,
+        executor: Optional[Executor] = None,
+        slots: Optional[anyio.Semaphore] = None,
+    ):
+        self.db = SQLiteDB(path, pool=pool, unit_of_work=unit_of_work, statements=statements)
+        self.executor = executor
+        self.slots = slots
+
+    async def _call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        call = functools.partial(func, *args, **kwargs)
+        if self.executor is None:
+            # Waits for the thread to finish if cancelled, so the connection is never shared
+            return await anyio.to_thread.run_sync(call)
+        future = self.executor.submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except BaseException:
+            if not future.done():
+                # Cancelled mid-statement: stop it and wait until the connection is free again
+                self.db.interrupt()
+                with anyio.CancelScope(shield=True):
+                    await asyncio.wait([asyncio.wrap_future(future)])
+            raise
+
+    async def __aenter__(self) -> "AsyncSQLiteDB":
+        if self.slots is not None:
+            await self.slots.acquire()
+        try:
+            await self._call(self.db.connect)
+        except BaseException:
+            if self.slots is not None:
+                self.slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # Commit or rollback and return the connection even if the request was cancelled
+        try:
+            with anyio.CancelScope(shield=True):
+                await self._call(self.db.__exit__, exc_type, exc, tb)
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Explicit transaction block, as SQLiteDB.transaction():
+            async with db.transaction():
+                ...
+        """
+        block = self.db.transaction()
+        await self._call(block.__enter__)
+        try:
+            yield
+        except BaseException as e:
+            with anyio.CancelScope(shield=True):
+                if not await self._call(block.__exit__, type(e), e, e.__traceback__):
+                    raise
+        else:
+            await self._call(block.__exit__, None, None, None)
+
+    # DDL
+    create_table = _on_db_thread("create_table")
+    ensure_indexes = _on_db_thread("ensure_indexes")
+    ensure_fts = _on_db_thread("ensure_fts")
+    ensure_change_counter = _on_db_thread("ensure_change_counter")
+    drop_table = _on_db_thread("drop_table")
+    table_exists = _on_db_thread("table_exists")
+    list_tables = _on_db_thread("list_tables")
+    table_version = _on_db_thread("table_version")
+
+    # CRUD
+    insert = _on_db_thread("insert")
+    insert_many = _on_db_thread("insert_many")
+    select = _on_db_thread("select")
+    search = _on_db_thread("search")
+    update = _on_db_thread("update")
+    delete = _on_db_thread("delete")
+    execute = _on_db_thread("execute")
@@ -2,31 +2,371 @@
 # Code assisted by OpenAI: GPT-5
 # Simple SQLite helper for common CRUD and DDL operations.
 
+import queue
+import re
+import secrets
 import sqlite3
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 
 RowDict = Dict[str, Any]
-Where = Optional[Mapping[str, Any]]
+Where = Optional[Union[Mapping[str, Any], "Group"]]
+IndexSpec = Union[str, Sequence[str]]
+Returning = Optional[Union[str, Sequence[str]]]
+
+# Basic whitelist: letters, digits, underscore, and optional dot for schema.table
+_IDENT_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$.")
+
+@lru_cache(maxsize=4096)
+def _quoted_ident(name: str) -> str:
+    """
+    Validates an identifier and returns it double-quoted. Each distinct name is checked once.
+    """
+    if not name or any(c in name for c in "\"'`;"):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    if not _IDENT_CHARS.issuperset(name):
+        raise ValueError(f"Invalid identifier characters in: {name!r}")
+    return f'"{name}"'
+
+class StatementCache:
+    """
+    LRU cache of generated SQL text, keyed on the shape of an operation: (operation, table,
+    columns, where shape, ...). A hit skips identifier validation, quoting and string building,
+    and the stable SQL text lets sqlite3 reuse its prepared statement as well.
+    maxsize=0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        with self._lock:
+            sql = self._statements.get(key)
+            if sql is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return sql
+            self.misses += 1
+        # Built outside the lock; two threads missing on the same key build the same text
+        sql = build()
+        if self.maxsize > 0:
+            with self._lock:
+                self._statements[key] = sql
+                if len(self._statements) > self.maxsize:
+                    self._statements.popitem(last=False)
+        return sql
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self.hits = self.misses = 0
+
+# Shared by all SQLiteDB instances
+statement_cache = StatementCache()
+
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query matching rows that contain every word as a prefix,
+    e.g. 'jo pune' -> '"jo"* "pune"*'. FTS5 operators in the input are treated as plain words.
+    """
+    return " ".join(f'"{term}"*' for term in _SEARCH_TERM.findall(text))
+
+class Predicate:
+    """
+    A non-equality condition, usable as a value in a `where` mapping:
+        db.select("users", where={"id": Lt(500)})
+    """
+
+    op = ""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def shape(self) -> Hashable:
+        # Predicates with the same shape compile to the same SQL for a given column
+        return type(self)
+
+    def sql(self, col: str) -> str:
+        return f"{col} {self.op} ?"
+
+    def params(self) -> List[Any]:
+        return [self.value]
+
+    def compile(self, col: str) -> Tuple[str, List[Any]]:
+        return self.sql(col), self.params()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.value!r})"
+
+class Lt(Predicate):
+    op = "<"
+
+class Le(Predicate):
+    op = "<="
+
+class Gt(Predicate):
+    op = ">"
+
+class Ge(Predicate):
+    op = ">="
+
+class Ne(Predicate):
+    op = "!="
+
+class Between(Predicate):
+    def __init__(self, low: Any, high: Any):
+        super().__init__((low, high))
+
+    def sql(self, col: str) -> str:
+        return f"{col} BETWEEN ? AND ?"
+
+    def params(self) -> List[Any]:
+        return list(self.value)
+
+class Like(Predicate):
+    """
+    LIKE pattern with backslash as escape character, e.g. Like("%smith%").
+    A leading wildcard cannot use an index; use StartsWith for prefixes.
+    """
+
+    def sql(self, col: str) -> str:
+        return f"{col} LIKE ? ESCAPE '\\'"
+
+class StartsWith(Predicate):
+    """
+    Case-sensitive prefix match, compiled to the range prefix <= col < next prefix
+    so that an index on the column can be used (LIKE 'abc%' cannot with the default collation).
+    """
+
+    def _upper_bound(self) -> Optional[str]:
+        # Smallest string after every string starting with the prefix, in code point order
+        # (SQLite's BINARY collation); None if there is none, i.e. the prefix is all U+10FFFF
+        prefix = str(self.value).rstrip("\U0010ffff")
+        if not prefix:
+            return None
+        last = ord(prefix[-1]) + 1
+        if 0xD800 <= last <= 0xDFFF:
+            # Surrogates cannot be encoded as UTF-8; U+D7FF is followed by U+E000
+            last = 0xE000
+        return prefix[:-1] + chr(last)
+
+    def _kind(self) -> str:
+        if not str(self.value):
+            return "any"
+        if self._upper_bound() is None:
+            return "open"
+        return "range"
+
+    def shape(self) -> Hashable:
+        return (type(self), self._kind())
+
+    def sql(self, col: str) -> str:
+        kind = self._kind()
+        if kind == "any":
+            return f"{col} IS NOT NULL"
+        if kind == "open":
+            return f"{col} >= ?"
+        return f"{col} >= ? AND {col} < ?"
+
+    def params(self) -> List[Any]:
+        prefix = str(self.value)
+        kind = self._kind()
+        if kind == "any":
+            return []
+        if kind == "open":
+            return [prefix]
+        return [prefix, self._upper_bound()]
+
+class Group:
+    """
+    Combines where mappings (or nested groups) with OR / AND:
+        Or({"city": "Pune"}, {"state": "KA", "name": StartsWith("A")})
+    """
+
+    joiner = ""
+
+    def __init__(self, *conditions: Union[Mapping[str, Any], "Group"]):
+        if not conditions:
+            raise ValueError(f"{type(self).__name__} needs at least one condition")
+        self.conditions = conditions
+
+class Or(Group):
+    joiner = " OR "
+
+class And(Group):
+    joiner = " AND "
+
+# Per-table change counters maintained by SQLiteDB.ensure_change_counter()
+CHANGE_COUNTER_TABLE = "_table_versions"
+
+# Applied once per pooled connection, when it is opened
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,
+    "mmap_size": 268435456,  # 256 MiB
+    "cache_size": -16000,  # negative = KiB, i.e. ~16 MiB per connection
+}
+
+# Read-only connections cannot change the journal mode; they read the WAL set up by the writers
+READ_ONLY_PRAGMAS: Dict[str, Any] = {
+    "query_only": "ON",
+    "busy_timeout": 5000,
+    "mmap_size": 268435456,
+    "cache_size": -16000,
+}
+
+class SQLiteConnectionPool:
+    """
+    Queue-based pool of SQLite connections shared across requests and threads.
+    Connections are opened lazily up to `size` and configured once with `pragmas`.
+    With read_only=True the database is opened with a mode=ro URI: such connections never take
+    the write lock and, in WAL mode, read concurrently with each other and with the writer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 8,
+        timeout: float = 30.0,
+        pragmas: Optional[Mapping[str, Any]] = None,
+        read_only: bool = False,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        if read_only and path == ":memory:":
+            raise ValueError("A read-only pool needs a database file")
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.read_only = read_only
+        if pragmas is None:
+            pragmas = READ_ONLY_PRAGMAS if read_only else DEFAULT_PRAGMAS
+        self.pragmas = dict(pragmas)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        # Connections move between worker threads; the pool makes sure only one uses each at a time
+        if self.read_only:
+            uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, timeout=self.timeout, check_same_thread=False, uri=True)
+        else:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Returns an idle connection, opening a new one while the pool is below its size.
+        Blocks up to `timeout` seconds when all connections are in use.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection available after {self.timeout} seconds")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a connection to the pool. Uncommitted work is rolled back.
+        """
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._opened -= 1
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        Closes all idle connections. Connections still in use are closed when released.
+        """
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
 
 class SQLiteDB:
     """
     Simple SQLite helper for common CRUD and DDL operations.
+    With a pool, connections are borrowed from it instead of opened per instance.
+    With unit_of_work=True, statements are not committed individually: everything done
+    between __enter__ and __exit__ shares one transaction and is committed once on exit.
     """
 
-    def __init__(self, path: str):
+    def __init__(
+        self,
+        path: str,
+        pool: Optional[SQLiteConnectionPool] = None,
+        unit_of_work: bool = False,
+        statements: Optional[StatementCache] = None,
+    ):
         self.path = path
+        self.pool = pool
+        self.unit_of_work = unit_of_work
+        self.statements = statement_cache if statements is None else statements
         self._conn: Optional[sqlite3.Connection] = None
 
     def connect(self) -> None:
         if self._conn is None:
+            if self.pool is not None:
+                self._conn = self.pool.acquire()
+                return
             self._conn = sqlite3.connect(self.path)
             self._conn.row_factory = sqlite3.Row
             self._conn.execute("PRAGMA foreign_keys = ON;")
 
     def close(self) -> None:
         if self._conn is not None:
-            self._conn.close()
+            if self.pool is not None:
+                self.pool.release(self._conn)
+            else:
+                self._conn.close()
             self._conn = None
 
     def __enter__(self) -> "SQLiteDB":
@@ -42,6 +382,13 @@ class SQLiteDB:
                 self._conn.rollback()
         self.close()
 
+    def interrupt(self) -> None:
+        """
+        Abort the statement running on this instance's connection. Safe to call from any thread.
+        """
+        if self._conn is not None:
+            self._conn.interrupt()
+
     @property
     def conn(self) -> sqlite3.Connection:
         self.connect()
@@ -53,9 +400,12 @@ class SQLiteDB:
         cur = self.conn.cursor()
         try:
             yield cur
-            self.conn.commit()
+            if not self.unit_of_work:
+                self.conn.commit()
         except Exception:
-            self.conn.rollback()
+            # In a unit of work the outcome is decided once, in __exit__
+            if not self.unit_of_work:
+                self.conn.rollback()
             raise
         finally:
             cur.close()
@@ -71,6 +421,7 @@ class SQLiteDB:
         foreign_keys: Optional[Sequence[str]] = None,
         if_not_exists: bool = True,
         without_rowid: bool = False,
+        indexes: Optional[Sequence[IndexSpec]] = None,
     ) -> None:
         """
         Create a table.
@@ -78,6 +429,7 @@ class SQLiteDB:
         primary_key: "id" or ["a", "b"]
         uniques: e.g. [["email"], ["a", "b"]]
         foreign_keys: raw constraints, e.g. ['FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE']
+        indexes: secondary indexes, e.g. ["city", ["country", "state"]]; see ensure_indexes
         """
         self._validate_ident(name)
         col_defs = [f'{self._quote_ident(col)} {type_}' for col, type_ in columns.items()]
@@ -105,6 +457,142 @@ class SQLiteDB:
         sql = f"CREATE TABLE {ine}{self._quote_ident(name)} (\n  " + ",\n  ".join(parts) + f"\n){tail};"
         with self.cursor() as cur:
             cur.execute(sql)
+        if indexes:
+            self.ensure_indexes(name, indexes)
+
+    def ensure_indexes(self, table: str, indexes: Sequence[IndexSpec]) -> List[str]:
+        """
+        Create the given secondary indexes if they do not exist yet.
+        Each spec is a column name or a list of columns; indexes are named idx_<table>_<columns>.
+        Returns the names of all the indexes in the spec.
+        """
+        self._validate_ident(table)
+        names: List[str] = []
+        for spec in indexes:
+            cols = [spec] if isinstance(spec, str) else list(spec)
+            self._validate_ids(cols)
+            index_name = f"idx_{table}_{'_'.join(cols)}"
+            col_sql = ", ".join(self._quote_ident(c) for c in cols)
+            with self.cursor() as cur:
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self._quote_ident(index_name)} "
+                    f"ON {self._quote_ident(table)} ({col_sql});"
+                )
+            names.append(index_name)
+        return names
+
+    def ensure_fts(
+        self,
+        table: str,
+        columns: Sequence[str],
+        key: str = "id",
+        fts_table: Optional[str] = None,
+    ) -> str:
+        """
+        Create an FTS5 index over the text columns of a table, if it does not exist yet.
+        The index is an external-content table (it stores no second copy of the rows), kept in
+        sync by insert/update/delete triggers and built from the existing rows on creation.
+        key must be the table's INTEGER PRIMARY KEY. Returns the name of the FTS table.
+        """
+        fts_table = fts_table or f"{table}_fts"
+        self._validate_ids([table, key, fts_table, *columns])
+        if self.table_exists(fts_table):
+            return fts_table
+
+        q = self._quote_ident
+        cols = ", ".join(q(c) for c in columns)
+        new_values = ", ".join(f"new.{q(c)}" for c in columns)
+        old_values = ", ".join(f"old.{q(c)}" for c in columns)
+        insert_new = f"INSERT INTO {q(fts_table)}(rowid, {cols}) VALUES (new.{q(key)}, {new_values});"
+        delete_old = (
+            f"INSERT INTO {q(fts_table)}({q(fts_table)}, rowid, {cols}) "
+            f"VALUES ('delete', old.{q(key)}, {old_values});"
+        )
+        statements = [
+            f"CREATE VIRTUAL TABLE {q(fts_table)} USING fts5({cols}, content={q(table)}, "
+            f"content_rowid={q(key)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3');",
+            f"CREATE TRIGGER IF NOT EXISTS {q(fts_table + '_ai')} AFTER INSERT ON {q(table)} BEGIN {insert_new} END;",
+            f"CREATE TRIGGER IF NOT EXISTS {q(fts_table + '_ad')} AFTER DELETE ON {q(table)} BEGIN {delete_old} END;",
+            f"CREATE TRIGGER IF NOT EXISTS {q(fts_table + '_au')} AFTER UPDATE ON {q(table)} BEGIN "
+            f"{delete_old} {insert_new} END;",
+            f"INSERT INTO {q(fts_table)}({q(fts_table)}) VALUES ('rebuild');",
+        ]
+        with self.transaction():
+            for sql in statements:
+                self.conn.execute(sql)
+        return fts_table
+
+    def ensure_change_counter(self, table: str) -> None:
+        """
+        Keep a version number for `table` in CHANGE_COUNTER_TABLE, bumped by triggers on every
+        inserted, updated or deleted row, including writes made by other processes.
+        The counter starts at a random value so a recreated database does not repeat old versions.
+        Read it with table_version().
+        """
+        self._validate_ident(table)
+        q = self._quote_ident
+        counter = q(CHANGE_COUNTER_TABLE)
+        bump = f"UPDATE {counter} SET version = version + 1 WHERE name = '{table}';"
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {counter} (name TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID;",
+            *(
+                f"CREATE TRIGGER IF NOT EXISTS {q(f'{table}_version_{suffix}')} AFTER {event} ON {q(table)} "
+                f"BEGIN {bump} END;"
+                for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+            ),
+        ]
+        with self.transaction():
+            for sql in statements:
+                self.conn.execute(sql)
+            self.conn.execute(
+                f"INSERT OR IGNORE INTO {counter} (name, version) VALUES (?, ?);", (table, secrets.randbits(48))
+            )
+
+    def table_version(self, table: str) -> Optional[int]:
+        """
+        Current version of a table set up with ensure_change_counter(), or None if it has none.
+        """
+        try:
+            with self.cursor() as cur:
+                cur.execute(f"SELECT version FROM {self._quote_ident(CHANGE_COUNTER_TABLE)} WHERE name = ?;", (table,))
+                row = cur.fetchone()
+        except sqlite3.OperationalError:
+            # No counter table in this database
+            return None
+        return row[0] if row else None
+
+    def search(
+        self,
+        table: str,
+        text: str,
+        key: str = "id",
+        fts_table: Optional[str] = None,
+        weights: Optional[Sequence[float]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[RowDict]:
+        """
+        Full-text search through the FTS5 index created by ensure_fts.
+        Returns the matching rows of `table`, best bm25 rank first; weights are per FTS column.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        fts_table = fts_table or f"{table}_fts"
+        weights_key = tuple(float(w) for w in weights) if weights else ()
+
+        def build() -> str:
+            q = self._quote_ident
+            rank = f"bm25({q(fts_table)}" + "".join(f", {w!r}" for w in weights_key) + ")"
+            return (
+                f"SELECT t.* FROM {q(fts_table)} JOIN {q(table)} AS t ON t.{q(key)} = {q(fts_table)}.rowid "
+                f"WHERE {q(fts_table)} MATCH ? ORDER BY {rank} LIMIT ? OFFSET ?"
+            )
+
+        sql = self.statements.get(("search", table, key, fts_table, weights_key), build)
+        with self.cursor() as cur:
+            cur.execute(sql, (query, limit, offset))
+            return [dict(r) for r in cur.fetchall()]
 
     def drop_table(self, name: str, if_exists: bool = True) -> None:
         self._validate_ident(name)
@@ -133,57 +621,113 @@ class SQLiteDB:
         or_replace: bool = False,
         or_ignore: bool = False,
         return_ids: bool = True,
-    ) -> Union[int, List[int], None]:
+        returning: Returning = None,
+    ) -> Union[int, List[int], RowDict, List[RowDict], None]:
         """
         Insert one or many rows.
-        Returns lastrowid for single insert, or list of ids for multiple inserts if return_ids=True.
+        Returns lastrowid for single insert, or for multiple inserts with return_ids=True the ids of
+        the inserted rows in ascending order. They do not correspond to the input positions: SQLite
+        does not order RETURNING output, and rows skipped by or_ignore are missing. To match rows to
+        the input, use returning with a unique column.
+        With returning (e.g. "*"), returns the inserted row(s) instead, read by the INSERT itself.
         """
-        self._validate_ident(table)
+        verb = self._insert_verb(or_replace, or_ignore)
 
-        def _insert_one(row: RowDict) -> int:
-            if not row:
+        if isinstance(data, Mapping):
+            if not data:
                 raise ValueError("Insert data cannot be empty.")
-            cols = list(row.keys())
-            self._validate_ids(cols)
-            placeholders = ", ".join(["?"] * len(cols))
-            col_sql = ", ".join(self._quote_ident(c) for c in cols)
-            verb = "INSERT"
-            if or_replace:
-                verb = "INSERT OR REPLACE"
-            elif or_ignore:
-                verb = "INSERT OR IGNORE"
-            sql = f"{verb} INTO {self._quote_ident(table)} ({col_sql}) VALUES ({placeholders});"
+            if not (return_ids or returning):
+                return None
+            cols = tuple(data.keys())
+            sql = self.statements.get(
+                ("insert", table, cols, verb, self._returning_key(returning)),
+                lambda: self._insert_sql(verb, table, cols, 1, returning),
+            )
             with self.cursor() as cur:
-                cur.execute(sql, tuple(row[c] for c in cols))
+                cur.execute(sql, tuple(data[c] for c in cols))
+                if returning:
+                    # None when OR IGNORE skipped the row
+                    inserted = cur.fetchone()
+                    return dict(inserted) if inserted is not None else None
                 return cur.lastrowid
-
-        if isinstance(data, Mapping):
-            last_id = _insert_one(data) if return_ids else None
-            return last_id
         else:
-            ids: List[int] = []
-            if return_ids:
-                for row in data:
-                    ids.append(_insert_one(row))
-                return ids
+            if return_ids or returning:
+                # One multi-row statement per chunk instead of a statement and commit per row
+                rows = self.insert_many(
+                    table, data, or_replace=or_replace, or_ignore=or_ignore, returning=returning or "rowid"
+                )
+                # The rowid column is named after the INTEGER PRIMARY KEY when the table has one
+                return rows if returning else sorted(row_id for r in rows for row_id in r.values())
             else:
                 # Fast path without collecting ids
                 if not data:
                     return None
-                cols = list(data[0].keys())
-                self._validate_ids(cols)
-                placeholders = ", ".join(["?"] * len(cols))
-                col_sql = ", ".join(self._quote_ident(c) for c in cols)
-                verb = "INSERT"
-                if or_replace:
-                    verb = "INSERT OR REPLACE"
-                elif or_ignore:
-                    verb = "INSERT OR IGNORE"
-                sql = f"{verb} INTO {self._quote_ident(table)} ({col_sql}) VALUES ({placeholders});"
+                cols = tuple(data[0].keys())
+                sql = self.statements.get(
+                    ("insert", table, cols, verb, None),
+                    lambda: self._insert_sql(verb, table, cols, 1, None),
+                )
                 with self.cursor() as cur:
                     cur.executemany(sql, [tuple(row[c] for c in cols) for row in data])
                 return None
 
+    def insert_many(
+        self,
+        table: str,
+        rows: Sequence[RowDict],
+        or_replace: bool = False,
+        or_ignore: bool = False,
+        returning: Returning = None,
+        rows_per_statement: int = 500,
+    ) -> Union[int, List[RowDict]]:
+        """
+        Bulk insert of rows that all have the same columns, in a single transaction.
+        Rows are sent as multi-row VALUES lists, chunked so no statement exceeds SQLite's
+        bound-variable limit; each chunk size is built (and prepared) once.
+        Returns the number of rows inserted, or with returning (e.g. "id") the inserted
+        rows as reported by RETURNING, in no particular order.
+        """
+        self._validate_ident(table)
+        if not rows:
+            return [] if returning else 0
+        cols = tuple(rows[0].keys())
+        if not cols:
+            raise ValueError("Insert data cannot be empty.")
+        col_set = set(cols)
+        for row in rows:
+            if len(row) != len(cols) or set(row) != col_set:
+                raise ValueError("All rows of a bulk insert must have the same columns.")
+
+        try:
+            max_vars = self.conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:
+            # Python < 3.11; SQLite's historical default
+            max_vars = 999
+        per_statement = max(1, min(rows_per_statement, max_vars // len(cols)))
+        verb = self._insert_verb(or_replace, or_ignore)
+        returning_key = self._returning_key(returning)
+
+        inserted: List[RowDict] = []
+        count = 0
+        with self.transaction():
+            cur = self.conn.cursor()
+            try:
+                for start in range(0, len(rows), per_statement):
+                    chunk = rows[start:start + per_statement]
+                    size = len(chunk)
+                    sql = self.statements.get(
+                        ("insert", table, cols, verb, returning_key, size),
+                        lambda: self._insert_sql(verb, table, cols, size, returning),
+                    )
+                    cur.execute(sql, [row[c] for row in chunk for c in cols])
+                    if returning:
+                        inserted.extend(dict(r) for r in cur.fetchall())
+                    else:
+                        count += cur.rowcount
+            finally:
+                cur.close()
+        return inserted if returning else count
+
     def select(
         self,
         table: str,
@@ -193,28 +737,14 @@ class SQLiteDB:
         limit: Optional[int] = None,
         offset: Optional[int] = None,
     ) -> List[RowDict]:
-        self._validate_ident(table)
-        cols_sql = "*"
-        if isinstance(columns, str):
-            cols_sql = columns if columns.strip() != "" else "*"
-        else:
-            self._validate_ids(columns)
-            cols_sql = ", ".join(self._quote_ident(c) for c in columns)
+        columns_key = columns if isinstance(columns, str) else tuple(columns)
+        key = ("select", table, columns_key, _where_shape(where), order_by, limit is not None, offset is not None)
+        sql = self.statements.get(key, lambda: self._select_sql(table, columns, where, order_by, limit, offset))
 
-        sql = f"SELECT {cols_sql} FROM {self._quote_ident(table)}"
-        where_sql, params = self._build_where(where)
-        if where_sql:
-            sql += " WHERE " + where_sql
-        if order_by:
-            sql += " ORDER BY " + order_by
+        params = _where_params(where)
         if limit is not None:
-            sql += " LIMIT ?"
             params.append(limit)
         if offset is not None:
-            if limit is None:
-                # SQLite requires LIMIT when using OFFSET; use a very large limit
-                sql += " LIMIT -1"
-            sql += " OFFSET ?"
             params.append(offset)
 
         with self.cursor() as cur:
@@ -227,30 +757,27 @@ class SQLiteDB:
         data: RowDict,
         where: Where = None,
         allow_all: bool = False,
-    ) -> int:
+        returning: Returning = None,
+    ) -> Union[int, List[RowDict]]:
         """
         Update rows. Returns number of affected rows.
+        With returning (e.g. "*"), returns the updated rows instead.
         To update all rows, set allow_all=True and where=None.
         """
-        self._validate_ident(table)
         if not data:
             return 0
         if where is None and not allow_all:
             raise ValueError("Refusing to update all rows without allow_all=True")
 
-        self._validate_ids(data.keys())
-        set_sql = ", ".join(f"{self._quote_ident(k)}=?" for k in data.keys())
-        set_params = list(data.values())
-
-        where_sql, where_params = self._build_where(where)
-        sql = f"UPDATE {self._quote_ident(table)} SET {set_sql}"
-        params: List[Any] = set_params
-        if where_sql:
-            sql += " WHERE " + where_sql
-            params += where_params
+        cols = tuple(data.keys())
+        key = ("update", table, cols, _where_shape(where), self._returning_key(returning))
+        sql = self.statements.get(key, lambda: self._update_sql(table, cols, where, returning))
+        params: List[Any] = list(data.values()) + _where_params(where)
 
         with self.cursor() as cur:
             cur.execute(sql, params)
+            if returning:
+                return [dict(r) for r in cur.fetchall()]
             return cur.rowcount
 
     def delete(
@@ -263,17 +790,13 @@ class SQLiteDB:
         Delete rows. Returns number of affected rows.
         To delete all rows, set allow_all=True and where=None.
         """
-        self._validate_ident(table)
         if where is None and not allow_all:
             raise ValueError("Refusing to delete all rows without allow_all=True")
 
-        where_sql, params = self._build_where(where)
-        sql = f"DELETE FROM {self._quote_ident(table)}"
-        if where_sql:
-            sql += " WHERE " + where_sql
+        sql = self.statements.get(("delete", table, _where_shape(where)), lambda: self._delete_sql(table, where))
 
         with self.cursor() as cur:
-            cur.execute(sql, params)
+            cur.execute(sql, _where_params(where))
             return cur.rowcount
 
     # ------------ Utilities ------------
@@ -296,7 +819,18 @@ class SQLiteDB:
         Explicit transaction block:
             with db.transaction():
                 ...
+        In a unit of work the block becomes a savepoint of the surrounding transaction.
         """
+        if self.unit_of_work:
+            self.conn.execute("SAVEPOINT block;")
+            try:
+                yield
+                self.conn.execute("RELEASE SAVEPOINT block;")
+            except Exception:
+                self.conn.execute("ROLLBACK TO SAVEPOINT block;")
+                self.conn.execute("RELEASE SAVEPOINT block;")
+                raise
+            return
         try:
             self.conn.execute("BEGIN;")
             yield
@@ -307,20 +841,96 @@ class SQLiteDB:
 
     # ------------ Internal helpers ------------
 
+    # Statement builders, only called on a statement cache miss
+
+    def _insert_verb(self, or_replace: bool, or_ignore: bool) -> str:
+        if or_replace:
+            return "INSERT OR REPLACE"
+        if or_ignore:
+            return "INSERT OR IGNORE"
+        return "INSERT"
+
+    def _insert_sql(self, verb: str, table: str, cols: Sequence[str], rows: int, returning: Returning) -> str:
+        col_sql = ", ".join(self._quote_ident(c) for c in cols)
+        row_sql = "(" + ", ".join(["?"] * len(cols)) + ")"
+        values = ", ".join([row_sql] * rows)
+        return f"{verb} INTO {self._quote_ident(table)} ({col_sql}) VALUES {values}{self._returning_sql(returning)};"
+
+    def _select_sql(self, table, columns, where, order_by, limit, offset) -> str:
+        if isinstance(columns, str):
+            cols_sql = columns if columns.strip() != "" else "*"
+        else:
+            cols_sql = ", ".join(self._quote_ident(c) for c in columns)
+
+        sql = f"SELECT {cols_sql} FROM {self._quote_ident(table)}"
+        where_sql = self._where_sql(where)
+        if where_sql:
+            sql += " WHERE " + where_sql
+        if order_by:
+            sql += " ORDER BY " + order_by
+        if limit is not None:
+            sql += " LIMIT ?"
+        if offset is not None:
+            if limit is None:
+                # SQLite requires LIMIT when using OFFSET; use a very large limit
+                sql += " LIMIT -1"
+            sql += " OFFSET ?"
+        return sql
+
+    def _update_sql(self, table: str, cols: Sequence[str], where: Where, returning: Returning) -> str:
+        set_sql = ", ".join(f"{self._quote_ident(k)}=?" for k in cols)
+        sql = f"UPDATE {self._quote_ident(table)} SET {set_sql}"
+        where_sql = self._where_sql(where)
+        if where_sql:
+            sql += " WHERE " + where_sql
+        return sql + self._returning_sql(returning)
+
+    def _delete_sql(self, table: str, where: Where) -> str:
+        sql = f"DELETE FROM {self._quote_ident(table)}"
+        where_sql = self._where_sql(where)
+        if where_sql:
+            sql += " WHERE " + where_sql
+        return sql
+
+    def _returning_key(self, returning: Returning) -> Hashable:
+        if not returning or isinstance(returning, str):
+            return returning or None
+        return tuple(returning)
+
+    def _returning_sql(self, returning: Returning) -> str:
+        if not returning:
+            return ""
+        if returning == "*":
+            return " RETURNING *"
+        if isinstance(returning, str):
+            returning = [returning]
+        return " RETURNING " + ", ".join(self._quote_ident(c) for c in returning)
+
     def _build_where(self, where: Where) -> Tuple[str, List[Any]]:
         """
         Build a simple WHERE clause from a dict of equality matches, None -> IS NULL,
-        list/tuple -> IN (...).
+        list/tuple -> IN (...), Predicate -> its comparison (e.g. Gt(10) -> col > ?).
+        Or/And groups combine several such dicts.
         """
+        return self._where_sql(where), _where_params(where)
+
+    def _where_sql(self, where: Where) -> str:
         if not where:
-            return "", []
+            return ""
+        if isinstance(where, Group):
+            parts: List[str] = []
+            for condition in where.conditions:
+                part_sql = self._where_sql(condition)
+                # An empty condition matches every row
+                parts.append(f"({part_sql})" if part_sql else "1=1")
+            return where.joiner.join(parts)
         clauses: List[str] = []
-        params: List[Any] = []
         for k, v in where.items():
-            self._validate_ident(k)
             col = self._quote_ident(k)
             if v is None:
                 clauses.append(f"{col} IS NULL")
+            elif isinstance(v, Predicate):
+                clauses.append(v.sql(col))
             elif isinstance(v, (list, tuple)):
                 if len(v) == 0:
                     # IN () is invalid; use a clause that is always false
@@ -328,19 +938,14 @@ class SQLiteDB:
                 else:
                     placeholders = ", ".join(["?"] * len(v))
                     clauses.append(f"{col} IN ({placeholders})")
-                    params.extend(list(v))
             else:
                 clauses.append(f"{col} = ?")
-                params.append(v)
-        return " AND ".join(clauses), params
+        return " AND ".join(clauses)
 
     def _validate_ident(self, name: str) -> None:
-        if not isinstance(name, str) or not name or any(c in name for c in "\"'`;"):
+        if not isinstance(name, str):
             raise ValueError(f"Invalid identifier: {name!r}")
-        # Basic whitelist: letters, digits, underscore, and optional dot for schema.table
-        allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$.")
-        if not set(name) <= allowed:
-            raise ValueError(f"Invalid identifier characters in: {name!r}")
+        _quoted_ident(name)
 
     def _validate_ids(self, names: Iterable[str]) -> None:
         for n in names:
@@ -348,5 +953,49 @@ class SQLiteDB:
 
     def _quote_ident(self, name: str) -> str:
         # Quote identifiers with double-quotes for safety
-        self._validate_ident(name)
-        return f'"{name}"'
\ No newline at end of file
+        if not isinstance(name, str):
+            raise ValueError(f"Invalid identifier: {name!r}")
+        return _quoted_ident(name)
+
+def _where_shape(where: Where) -> Hashable:
+    """
+    The part of a where clause that determines its SQL text: column names and the kind of each
+    condition, but not the bound values. Used in statement cache keys.
+    """
+    if not where:
+        return None
+    if isinstance(where, Group):
+        return (where.joiner, tuple(_where_shape(condition) for condition in where.conditions))
+    shape = []
+    for k, v in where.items():
+        if v is None:
+            shape.append((k, "null"))
+        elif isinstance(v, Predicate):
+            shape.append((k, v.shape()))
+        elif isinstance(v, (list, tuple)):
+            shape.append((k, "in", len(v)))
+        else:
+            shape.append((k, "="))
+    return tuple(shape)
+
+def _where_params(where: Where) -> List[Any]:
+    """
+    The bound values of a where clause, in the order of the placeholders of _where_sql.
+    """
+    if not where:
+        return []
+    params: List[Any] = []
+    if isinstance(where, Group):
+        for condition in where.conditions:
+            params.extend(_where_params(condition))
+        return params
+    for v in where.values():
+        if v is None:
+            continue
+        if isinstance(v, Predicate):
+            params.extend(v.params())
+        elif isinstance(v, (list, tuple)):
+            params.extend(v)
+        else:
+            params.append(v)
+    return params
@@ -0,0 +1,98 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+def make_etag(table: str, version: int, resource: str = "") -> str:
+    """
+    ETag of a resource (e.g. its path and query) built from a table at the given version.
+    Different resources of the same table get different ETags.
+    """
+    digest = hashlib.blake2s(resource.encode(), digest_size=8).hexdigest()
+    return f'"{table}-{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header value names the given ETag. Weak comparison, as RFC 9110
+    requires for If-None-Match: W/ prefixes are ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """
+    LRU cache of serialized response bodies, keyed on (table, request key) and tagged with the
+    table version they were built at. An entry is only served while the table is still at that
+    version, so writes from any worker process make it stale; invalidate() drops entries eagerly.
+    maxsize=0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[int, bytes]]" = OrderedDict()
+        self._tables: Dict[str, Set[Tuple[str, Hashable]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, table: str, key: Hashable, version: int) -> Optional[bytes]:
+        """
+        Returns the cached body if it was built at the given table version, or None.
+        """
+        entry_key = (table, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, table: str, key: Hashable, version: int, body: bytes) -> None:
+        if self.maxsize <= 0:
+            return
+        entry_key = (table, key)
+        with self._lock:
+            self._entries[entry_key] = (version, body)
+            self._entries.move_to_end(entry_key)
+            self._tables.setdefault(table, set()).add(entry_key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """
+        Drops every cached response of the given table, or the whole cache if table is None.
+        """
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._tables.clear()
+                return
+            for entry_key in list(self._tables.get(table, ())):
+                self._remove(entry_key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _remove(self, entry_key: Tuple[str, Hashable]) -> None:
+        del self._entries[entry_key]
+        keys = self._tables.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self._tables[entry_key[0]]
+
+# Shared cache for the whole process
+response_cache = ResponseCache()
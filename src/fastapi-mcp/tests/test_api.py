@@ -0,0 +1,100 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.response_cache import response_cache
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "DB_PATH", str(tmp_path / "api.db"))
+    monkeypatch.setenv("API_BEARER_TOKEN", "t")
+    response_cache.invalidate()
+    with TestClient(main.app, headers={"Authorization": "Bearer t"}) as client:
+        assert client.post("/init-db").json() == {"ok": True, "created": True}
+        yield client
+
+def user(n, **fields):
+    return {"email": f"user{n}@example.com", "name": f"User {n}", "phone": 9000000000 + n, **fields}
+
+def create_users(client, count):
+    response = client.post("/users:bulk", json=[user(n) for n in range(count)])
+    assert response.status_code == 201
+    return {u["index"]: u["id"] for u in response.json()["users"]}
+
+def test_bulk_insert_maps_ids_to_payload_positions(client):
+    ids = create_users(client, 3)
+    assert sorted(ids) == [0, 1, 2]
+    for index, user_id in ids.items():
+        assert client.get(f"/users/{user_id}").json()["email"] == f"user{index}@example.com"
+
+def test_bulk_insert_skip_existing(client):
+    create_users(client, 2)
+    payload = [user(1), user(5), user(0)]
+    assert client.post("/users:bulk", json=payload).status_code == 409
+
+    response = client.post("/users:bulk", params={"skip_existing": True}, json=payload)
+    body = response.json()
+    assert body["inserted"] == 1
+    assert [u["index"] for u in body["users"]] == [1]
+    assert client.get(f"/users/{body['users'][0]['id']}").json()["email"] == "user5@example.com"
+
+def test_keyset_pages_walk_all_users_newest_first(client):
+    create_users(client, 7)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/users:page", params=params).json()
+        seen.extend(u["id"] for u in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 7
+    assert seen == sorted(seen, reverse=True)
+
+def test_keyset_pages_with_filter_and_bad_cursor(client):
+    client.post("/users:bulk", json=[user(n, name=("Jo " if n % 2 else "Al ") + str(n)) for n in range(6)])
+    first = client.get("/users:page", params={"name_prefix": "Jo", "limit": 2}).json()
+    assert [u["name"] for u in first["items"]] == ["Jo 5", "Jo 3"]
+    second = client.get("/users:page", params={"name_prefix": "Jo", "limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [u["name"] for u in second["items"]] == ["Jo 1"]
+    assert second["next_cursor"] is None
+    assert client.get("/users:page", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_search_index_follows_updates_and_deletes(client):
+    ids = create_users(client, 2)
+    client.patch(f"/users/{ids[0]}", json={"city": "Pune"})
+    found = client.get("/users:search", params={"q": "pun"}).json()["items"]
+    assert [u["id"] for u in found] == [ids[0]]
+
+    assert client.delete(f"/users/{ids[0]}").status_code == 200
+    assert client.get("/users:search", params={"q": "pun"}).json()["items"] == []
+    assert [u["id"] for u in client.get("/users:search", params={"q": "user1"}).json()["items"]] == [ids[1]]
+
+def test_etag_revalidation(client):
+    ids = create_users(client, 2)
+    first = client.get(f"/users/{ids[0]}")
+    etag = first.headers["etag"]
+    assert client.get(f"/users/{ids[0]}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/users/{ids[0]}", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # ETags are per resource, and a missing resource is a 404 whatever the client sends
+    assert client.get(f"/users/{ids[1]}").headers["etag"] != etag
+    assert client.get(f"/users/{ids[1]}", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/users/999", headers={"If-None-Match": "*"}).status_code == 404
+
+    # A write moves the version, so the old ETag no longer matches
+    client.patch(f"/users/{ids[0]}", json={"name": "Renamed"})
+    response = client.get(f"/users/{ids[0]}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.headers["etag"] != etag
+
+def test_list_etag_depends_on_query(client):
+    create_users(client, 3)
+    all_users = client.get("/users")
+    limited = client.get("/users", params={"limit": 1})
+    assert len(limited.json()) == 1
+    assert all_users.headers["etag"] != limited.headers["etag"]
+    assert client.get("/users", headers={"If-None-Match": all_users.headers["etag"]}).status_code == 304
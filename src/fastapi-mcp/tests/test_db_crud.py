@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+from src.db_crud import And, Between, Like, Lt, Or, SQLiteDB, StartsWith, StatementCache
+
+@pytest.fixture
+def db(tmp_path):
+    with SQLiteDB(str(tmp_path / "crud.db"), statements=StatementCache()) as db:
+        db.create_table(
+            "people",
+            columns={"id": "INTEGER", "name": "TEXT", "city": "TEXT", "age": "INTEGER"},
+            primary_key="id",
+            uniques=[["name"]],
+        )
+        db.insert_many("people", [
+            {"name": "Alice", "city": "Pune", "age": 31},
+            {"name": "Albert", "city": "Delhi", "age": 45},
+            {"name": "Bob", "city": "Pune", "age": 25},
+            {"name": "Carol", "city": "Mumbai", "age": 38},
+            {"name": "al%ice", "city": None, "age": 20},
+        ])
+        yield db
+
+def names(rows):
+    return sorted(row["name"] for row in rows)
+
+def test_comparison_predicates(db):
+    assert names(db.select("people", where={"age": Lt(30)})) == ["Bob", "al%ice"]
+    assert names(db.select("people", where={"age": Between(30, 40)})) == ["Alice", "Carol"]
+    assert names(db.select("people", where={"name": Like("al\\%%")})) == ["al%ice"]
+
+def test_starts_with_is_case_sensitive(db):
+    assert names(db.select("people", where={"name": StartsWith("Al")})) == ["Albert", "Alice"]
+    assert names(db.select("people", where={"name": StartsWith("al")})) == ["al%ice"]
+    assert names(db.select("people", where={"city": StartsWith("")})) == ["Albert", "Alice", "Bob", "Carol"]
+
+def test_starts_with_upper_bounds():
+    assert StartsWith("ab").params() == ["ab", "ac"]
+    # The code point after U+D7FF that UTF-8 can encode is U+E000
+    assert StartsWith("a\ud7ff").params() == ["a\ud7ff", "a\ue000"]
+    assert StartsWith("a\U0010ffff").params() == ["a\U0010ffff", "b"]
+    assert StartsWith("\U0010ffff").sql('"c"') == '"c" >= ?'
+
+def test_groups(db):
+    where = Or({"city": "Mumbai"}, And({"city": "Pune"}, {"age": Lt(30)}))
+    assert names(db.select("people", where=where)) == ["Bob", "Carol"]
+    # Same shape, different values: the cached SQL is reused with new parameters
+    where = Or({"city": "Delhi"}, And({"city": "Pune"}, {"age": Lt(40)}))
+    assert names(db.select("people", where=where)) == ["Albert", "Alice", "Bob"]
+
+def test_insert_many_returning_and_or_ignore(db):
+    rows = db.insert_many(
+        "people",
+        [{"name": "Dan", "city": "Goa", "age": 50}, {"name": "Bob", "city": "Goa", "age": 51}],
+        or_ignore=True,
+        returning=["id", "name"],
+    )
+    assert [row["name"] for row in rows] == ["Dan"]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_many("people", [{"name": "Bob", "city": "Goa", "age": 51}])
+
+def test_insert_list_returns_sorted_ids(db):
+    ids = db.insert("people", [{"name": "Eve", "age": 1}, {"name": "Fay", "age": 2}])
+    assert ids == sorted(ids) and len(ids) == 2
@@ -0,0 +1,29 @@
+import threading
+
+from src.db_crud import StatementCache
+
+def test_hit_miss_and_eviction():
+    cache = StatementCache(maxsize=2)
+    assert cache.get("a", lambda: "A") == "A"
+    assert cache.get("a", lambda: "other") == "A"
+    cache.get("b", lambda: "B")
+    cache.get("a", lambda: "A")
+    # "b" is now least recently used
+    cache.get("c", lambda: "C")
+    assert cache.get("b", lambda: "B2") == "B2"
+    assert (cache.hits, cache.misses) == (2, 4)
+
+def test_counters_are_exact_under_concurrency():
+    cache = StatementCache(maxsize=8)
+
+    def work():
+        for i in range(5000):
+            cache.get(i % 16, lambda: "sql")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits + cache.misses == 40000
+    assert len(cache._statements) == 8
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for the query result encoders.
+
+Compares the previous dict-per-row Markdown/JSON path with ResultEncoder on synthetic rows
+that mix the types a database returns, and reports the encoded size of each format
+(a rough proxy for the tokens sent to the LLM).
+
+Run from src/mcp-prod-server:
+    python benchmarks/bench_result_encoder.py --rows 1000
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.result_encoder import ResultEncoder
+
+COLUMNS = ["ORDER_ID", "CUSTOMER_NAME", "AMOUNT", "CREATED_AT", "SHIP_DATE", "STATUS", "CHECKSUM"]
+
+def make_rows(count) -> list:
+    start = datetime.datetime(2024, 1, 1, 8, 30)
+    return [
+        (
+            i,
+            f"Customer {i % 97}",
+            Decimal(i * 7 % 10000) / 100,
+            start + datetime.timedelta(minutes=i),
+            (start + datetime.timedelta(days=i % 30)).date(),
+            "SHIPPED" if i % 3 else None,
+            bytes([i % 256, (i * 31) % 256, 7, 42]),
+        )
+        for i in range(count)
+    ]
+
+def dict_markdown(rows) -> str:
+    # The previous implementation: one dict per row, str() per cell
+    data = [dict(zip(COLUMNS, row)) for row in rows]
+    headers = list(data[0].keys())
+    lines = ["| " + " | ".join(headers) + " |", "| " + " | ".join(["---"] * len(headers)) + " |"]
+    for row_dict in data:
+        lines.append("| " + " | ".join(str(row_dict.get(header, "")) for header in headers) + " |")
+    return "\n".join(lines)
+
+def dict_json(rows) -> str:
+    # Dicts serialized by the generic encoder; default=str is needed for Decimal, dates and bytes
+    return json.dumps([dict(zip(COLUMNS, row)) for row in rows], default=str)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    encoders = {name: ResultEncoder(COLUMNS, name) for name in ResultEncoder.FORMATS}
+    cases = {
+        "dict markdown (old)": lambda: dict_markdown(rows),
+        "dict json.dumps (old)": lambda: dict_json(rows),
+        "encoder md": lambda: encoders["md"].encode(rows),
+        "encoder csv": lambda: encoders["csv"].encode(rows),
+        "encoder json": lambda: json.dumps(encoders["json"].encode(rows)),
+        "encoder compact": lambda: json.dumps(encoders["compact"].encode(rows)),
+    }
+
+    print(f"{args.rows} rows, best of {args.repeat} x {args.number}")
+    print(f"{'case':<24}{'ms/call':>10}{'chars':>12}")
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, repeat=args.repeat, number=args.number)) / args.number
+        output = func()
+        print(f"{name:<24}{best * 1000:>10.3f}{len(output):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,64 @@ import os
 
 # Add all the env variables here
 class AppConfig:
-    MCP_AUTH_TOKEN: str = os.getenv("MCP_AUTH_TOKEN")
\ No newline at end of file
+    MCP_AUTH_TOKEN: str = os.getenv("MCP_AUTH_TOKEN")
+
+    # Database connection
+    USER: str = os.getenv("DB2_USER")
+    PASSWORD: str = os.getenv("DB2_PASSWORD")
+    DB2_HOST: str = os.getenv("DB2_HOST")
+    DB2_PORT: str = os.getenv("DB2_PORT")
+    DB2_DATABASE: str = os.getenv("DB2_DATABASE")
+    DB2_SCHEMA: str = os.getenv("DB2_SCHEMA")
+    SSL: str = os.getenv("DB2_SSL")
+    # Result format: json, compact (columns + rows), md or csv
+    OUTPUT_FORMAT: str = os.getenv("OUTPUT_FORMAT", "json")
+
+    # Connection pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Drivers. Async mode uses an AsyncEngine with DB_ASYNC_DRIVER; tools fall
+    # back to the sync driver in a worker thread if it is not available.
+    DB_DRIVER: str = os.getenv("DB_DRIVER", "mysql+pymysql")
+    DB_ASYNC_MODE: bool = os.getenv("DB_ASYNC_MODE", "false").lower() == "true"
+    DB_ASYNC_DRIVER: str = os.getenv("DB_ASYNC_DRIVER", "mysql+aiomysql")
+
+    # Query result limits. Rows are streamed from a server-side cursor and
+    # delivery stops at whichever budget is reached first.
+    QUERY_MAX_ROWS: int = int(os.getenv("QUERY_MAX_ROWS", "1000"))
+    QUERY_MAX_BYTES: int = int(os.getenv("QUERY_MAX_BYTES", "1000000"))
+    QUERY_FETCH_SIZE: int = int(os.getenv("QUERY_FETCH_SIZE", "500"))
+    QUERY_CHUNK_ROWS: int = int(os.getenv("QUERY_CHUNK_ROWS", "100"))
+
+    # Catalog metadata cache used by list_tables and get_table_schema
+    METADATA_CACHE_TTL: int = int(os.getenv("METADATA_CACHE_TTL", "600"))
+    METADATA_CACHE_SIZE: int = int(os.getenv("METADATA_CACHE_SIZE", "1024"))
+    METADATA_CACHE_WARMUP: bool = os.getenv("METADATA_CACHE_WARMUP", "false").lower() == "true"
+
+    # Sample rows returned per table by get_table_schema
+    SCHEMA_SAMPLE_ROWS: int = int(os.getenv("SCHEMA_SAMPLE_ROWS", "2"))
+
+    # Result cache for read-only sql_db_query statements
+    QUERY_CACHE_ENABLED: bool = os.getenv("QUERY_CACHE_ENABLED", "false").lower() == "true"
+    QUERY_CACHE_TTL: int = int(os.getenv("QUERY_CACHE_TTL", "300"))
+    QUERY_CACHE_MAX_BYTES: int = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # SQL guard used by sql_query_checker (and by sql_db_query when enforced)
+    SQL_DIALECT: str = os.getenv("SQL_DIALECT") or None
+    SQL_MAX_LIMIT: int = int(os.getenv("SQL_MAX_LIMIT", os.getenv("QUERY_MAX_ROWS", "1000")))
+    SQL_GUARD_ENFORCE: bool = os.getenv("SQL_GUARD_ENFORCE", "false").lower() == "true"
+    SQL_EXPLAIN_ENABLED: bool = os.getenv("SQL_EXPLAIN_ENABLED", "false").lower() == "true"
+    SQL_MAX_ESTIMATED_ROWS: int = int(os.getenv("SQL_MAX_ESTIMATED_ROWS", "10000000"))
+    SQL_MAX_ESTIMATED_COST: float = float(os.getenv("SQL_MAX_ESTIMATED_COST", "1000000"))
+    SQL_CHECK_CACHE_SIZE: int = int(os.getenv("SQL_CHECK_CACHE_SIZE", "1024"))
+
+    # Per-tool deadlines in seconds (0 disables). Passed to the database as a
+    # statement timeout where the driver supports it, and enforced by the server.
+    LIST_TABLES_TIMEOUT: float = float(os.getenv("LIST_TABLES_TIMEOUT", "30"))
+    GET_TABLE_SCHEMA_TIMEOUT: float = float(os.getenv("GET_TABLE_SCHEMA_TIMEOUT", "60"))
+    SQL_QUERY_CHECKER_TIMEOUT: float = float(os.getenv("SQL_QUERY_CHECKER_TIMEOUT", "30"))
+    SQL_DB_QUERY_TIMEOUT: float = float(os.getenv("SQL_DB_QUERY_TIMEOUT", "120"))
@@ -1,8 +1,12 @@
-from fastmcp import FastMCP
-from fastapi import FastAPI
+from fastmcp import FastMCP, Context
+from fastapi import Depends, FastAPI, HTTPException, Security
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.requests import Request
 from starlette.responses import JSONResponse
+from contextlib import asynccontextmanager
+from functools import partial
 import anyio
+import secrets
 
 # Read environment variables
 from config.app_config import AppConfig
@@ -10,6 +14,22 @@ app_config = AppConfig()
 
 # Define MCP authentication
 auth_token = app_config.MCP_AUTH_TOKEN
+security = HTTPBearer(auto_error=False)
+
+def verify_admin_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> None:
+    # Admin endpoints are disabled unless MCP_AUTH_TOKEN is set
+    if not auth_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set MCP_AUTH_TOKEN to enable them")
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if not secrets.compare_digest(credentials.credentials, auth_token):
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+
+# Shared pool of database engines and catalog metadata cache
+from src.engine_registry import engine_registry
+from src.metadata_cache import metadata_cache
+from src.result_cache import query_result_cache
+from src.query_timeout import run_async_with_timeout, run_sync_with_timeout
 
 # Define MCP server
 mcp = FastMCP(name="IBM db2 MCP server")
@@ -32,11 +52,13 @@ async def list_tables() -> dict:
     Returns a comma-separated list of tables in the SQLite database.
     """
     from src.db_list_tables import ListTables
-    return await anyio.to_thread.run_sync(
-        ListTables(
-            schema=app_config.DB2_SCHEMA
-            ).list_table
+    tool = ListTables(
+        schema=app_config.DB2_SCHEMA,
+        timeout=app_config.LIST_TABLES_TIMEOUT
         )
+    if engine_registry.async_enabled:
+        return await run_async_with_timeout(tool.alist_table, tool.timeout)
+    return await run_sync_with_timeout(tool.list_table, tool.timeout)
 
 @mcp.tool(
     name="get_table_schema",
@@ -47,16 +69,18 @@ async def list_tables() -> dict:
 )
 async def get_table_schema(table_name: str) -> dict:
     """
-    Returns schema and 2 sample rows for each valid table.
+    Returns schema, primary key and SCHEMA_SAMPLE_ROWS sample rows for each valid table.
     Input: Comma-separated list of table names (e.g., 'orders, vendors')
     """
     from src.get_table_schema import GetTableSchema
-    return await anyio.to_thread.run_sync(
-        GetTableSchema(
-            table_name=table_name,
-            schema=app_config.DB2_SCHEMA
-            ).get
+    tool = GetTableSchema(
+        table_name=table_name,
+        schema=app_config.DB2_SCHEMA,
+        timeout=app_config.GET_TABLE_SCHEMA_TIMEOUT
         )
+    if engine_registry.async_enabled:
+        return await run_async_with_timeout(tool.aget, tool.timeout)
+    return await run_sync_with_timeout(tool.get, tool.timeout)
 
 @mcp.tool(
     name="sql_query_checker",
@@ -67,15 +91,17 @@ async def get_table_schema(table_name: str) -> dict:
 )
 async def sql_query_checker(query: str) -> dict:
     """
-    Performs basic validation of the SQL query string.
-    :returns: a natural language evaluation.
+    Validates the parsed SQL query: read-only statements only, no cartesian joins, LIMIT enforced,
+    and optionally an EXPLAIN-based cost check.
+    :returns: a natural language evaluation and the query to execute.
     """
     from src.db_query_checker import DatabaseQueryChecker
-    return await anyio.to_thread.run_sync(
-        DatabaseQueryChecker(
-            query=query
-            ).check
+    tool = DatabaseQueryChecker(
+        query=query,
+        timeout=app_config.SQL_QUERY_CHECKER_TIMEOUT,
+        schema=app_config.DB2_SCHEMA
         )
+    return await run_sync_with_timeout(tool.check, tool.timeout)
 
 @mcp.tool(
     name="sql_db_query",
@@ -84,27 +110,85 @@ async def sql_query_checker(query: str) -> dict:
     meta={"version": "1.2", "author": "Manoj Jahgirdar"},
     output_schema={"type": "object", "query_results": "dict"},
 )
-def sql_db_query(sql_query: str) -> dict:
+async def sql_db_query(sql_query: str, ctx: Context) -> dict:
     """
     Executes a SQL query against the database and returns the results in JSON format.
     Input: A valid SQL query string (e.g., 'SELECT * FROM orders LIMIT 5')
+    Results are capped by QUERY_MAX_ROWS / QUERY_MAX_BYTES; progress is reported every QUERY_CHUNK_ROWS rows.
     """
     from src.db_query import QueryDatabaseTable
-    obj = QueryDatabaseTable(query=sql_query, schema=app_config.DB2_SCHEMA)
-    output = obj.exec_sql()
-    return output
+    obj = QueryDatabaseTable(query=sql_query, schema=app_config.DB2_SCHEMA, timeout=app_config.SQL_DB_QUERY_TIMEOUT)
+    if engine_registry.async_enabled:
+        return await run_async_with_timeout(partial(obj.aexec_sql, on_chunk=ctx.report_progress), obj.timeout)
+
+    def on_chunk(rows):
+        anyio.from_thread.run(ctx.report_progress, rows)
+
+    return await run_sync_with_timeout(partial(obj.exec_sql, on_chunk=on_chunk), obj.timeout)
 
 # Mount the MCP server to the FastAPI app
 mcp_app = mcp.http_app(path='/mcp')
 
+async def warm_up_metadata_cache():
+    try:
+        if engine_registry.async_enabled:
+            engine = await engine_registry.get_async_engine()
+            if engine is not None:
+                async with engine.connect() as conn:
+                    tables = await conn.run_sync(metadata_cache.warm_up, app_config.DB2_SCHEMA)
+        else:
+            engine = await anyio.to_thread.run_sync(engine_registry.get_engine)
+            if engine is not None:
+                def warm_up():
+                    with engine.connect() as conn:
+                        return metadata_cache.warm_up(conn, app_config.DB2_SCHEMA)
+                tables = await anyio.to_thread.run_sync(warm_up)
+        if engine is not None:
+            print(f"[Info] Metadata cache warmed up with {tables} tables")
+    except Exception as e:
+        print(f"[Error] Metadata cache warm-up failed: {e}")
+
+# Create the pooled engine once at startup and close its connections on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if engine_registry.async_enabled:
+        await engine_registry.get_async_engine()
+    # Also when the async engine could not connect: tools then run on the sync engine
+    if not engine_registry.async_enabled:
+        await anyio.to_thread.run_sync(engine_registry.get_engine)
+    if app_config.METADATA_CACHE_WARMUP:
+        await warm_up_metadata_cache()
+    try:
+        async with mcp_app.lifespan(app):
+            yield
+    finally:
+        await engine_registry.dispose_all()
+
 # Define FastAPI app
-api = FastAPI(lifespan=mcp_app.lifespan)
+api = FastAPI(lifespan=lifespan)
 
 # Define a simple status endpoint
 @api.get("/api/status")
 def status():
     return {"status": "ok"}
 
+# Drop cached catalog metadata, e.g. after a schema migration
+@api.post("/api/metadata/invalidate", dependencies=[Depends(verify_admin_token)])
+def invalidate_metadata(schema: str | None = None, table: str | None = None):
+    metadata_cache.invalidate(schema=schema, table=table)
+    return {"status": "ok"}
+
+# Hit/miss counters of the sql_db_query result cache
+@api.get("/api/query-cache/stats")
+def query_cache_stats():
+    return query_result_cache.stats()
+
+# Drop cached query results, for all tables or the given one
+@api.post("/api/query-cache/invalidate", dependencies=[Depends(verify_admin_token)])
+def invalidate_query_cache(table: str | None = None):
+    query_result_cache.invalidate(table=table)
+    return {"status": "ok"}
+
 api.mount("/dbtools", mcp_app)
 
 if __name__ == "__main__":
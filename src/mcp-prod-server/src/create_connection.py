@@ -1,41 +1,80 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, literal_column, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
 from urllib.parse import quote_plus
 
+# Compiled per dialect, e.g. SELECT 1 FROM SYSIBM.SYSDUMMY1 on DB2 and SELECT 1 on MySQL
+_PROBE = select(literal_column("1"))
+
 class CreateConnection:
-    
+
     # Constructor
-    def __init__(self, user, password, host, port, db_name, ssl) -> None:
+    def __init__(self, user, password, host, port, db_name, ssl,
+                 driver="mysql+pymysql", pool_size=5, max_overflow=10,
+                 pool_timeout=30, pool_recycle=1800, pool_pre_ping=True) -> None:
         self.user = user
-        self.password = quote_plus(password)
+        self.password = quote_plus(password) if password else password
         self.host = host
         self.port = port
         self.db_name = db_name
         self.ssl = ssl
-    
+        self.driver = driver
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+
     # Methods
+    def connection_string(self) -> str:
+        user = self.user
+        pwd = self.password
+        host = self.host
+        port = self.port
+        db_name = self.db_name
+
+        if not all([user, pwd, host, port, db_name]):
+            raise ValueError("Missing one or more DB connection environment variables")
+
+        return f'{self.driver}://{user}:{pwd}@{host}:{port}/{db_name}'
+
+    def engine_options(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
     def create(self):
         try:
-            user = self.user
-            pwd = self.password
-            host = self.host
-            port = self.port
-            db_name = self.db_name
-
-            if not all([user, pwd, host, port, db_name]):
-                raise ValueError("Missing one or more DB connection environment variables")
-            
-            connection_string = f'mysql+pymysql://{user}:{pwd}@{host}:{port}/{db_name}'
-            
-            engine = create_engine(connection_string)
-
-            # Test the connection
+            # Pooled engine: connections are reused across tool calls and
+            # validated on checkout by pre-ping instead of a probe per call.
+            engine = create_engine(self.connection_string(), **self.engine_options())
+
+            # Test the connection once, when the engine is created
             with engine.connect() as conn:
-                conn.execute(text("SELECT 1 FROM SYSIBM.SYSDUMMY1"))
+                conn.execute(_PROBE)
             return engine
         except SQLAlchemyError as e:
             print(f"[SQLAlchemyError] DB connection failed: {e}")
             return None
         except Exception as e:
             print(f"[Error] DB connection failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    async def create_async(self):
+        try:
+            engine = create_async_engine(self.connection_string(), **self.engine_options())
+
+            # Test the connection once, when the engine is created
+            async with engine.connect() as conn:
+                await conn.execute(_PROBE)
+            return engine
+        except SQLAlchemyError as e:
+            print(f"[SQLAlchemyError] Async DB connection failed: {e}")
+            return None
+        except Exception as e:
+            print(f"[Error] Async DB connection failed: {e}")
+            return None
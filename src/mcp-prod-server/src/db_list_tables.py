@@ -1,34 +1,56 @@
 from sqlalchemy import inspect
-from config.app_config import AppConfig
-app_config = AppConfig()
 
-from .create_connection import CreateConnection
+from .engine_registry import engine_registry
+from .metadata_cache import metadata_cache
+from .query_timeout import aguarded_connection, guarded_connection
 
 class ListTables:
     """
     Class to list tables in a DB2 database.
     """
 
-    def __init__(self, schema):
+    def __init__(self, schema, timeout=None):
         self.schema = schema
+        self.timeout = timeout
 
-    def list_table(self) -> dict:
+    def _table_names(self, conn) -> list:
+        inspector = inspect(conn)
+        tables = inspector.get_table_names(schema=self.schema)
+        metadata_cache.set(self.schema, None, tables)
+        return tables
+
+    def list_table(self, canceller=None) -> dict:
         try:
-            engine = CreateConnection(
-                user=app_config.USER,
-                password=app_config.PASSWORD,
-                host=app_config.DB2_HOST,
-                port=app_config.DB2_PORT,
-                db_name=app_config.DB2_DATABASE,
-                ssl=app_config.SSL
-            ).create()
+            cached = metadata_cache.get(self.schema)
+            if cached is not None:
+                return {"tables": cached}
+
+            engine = engine_registry.get_engine()
+            if engine is None:
+                return {"tables": []}
+
+            with guarded_connection(engine, self.timeout, canceller) as conn:
+                output = self._table_names(conn)
+            return {"tables": output}
+
+        except Exception as e:
+            print(f"[Error] Could not list tables: {e}")
+            return {"tables": []}
+
+    async def alist_table(self) -> dict:
+        try:
+            cached = metadata_cache.get(self.schema)
+            if cached is not None:
+                return {"tables": cached}
+
+            engine = await engine_registry.get_async_engine()
             if engine is None:
-                return []
+                return {"tables": []}
 
-            inspector = inspect(engine)
-            output = inspector.get_table_names(schema=self.schema)
+            async with aguarded_connection(engine, self.timeout) as conn:
+                output = await conn.run_sync(self._table_names)
             return {"tables": output}
 
         except Exception as e:
             print(f"[Error] Could not list tables: {e}")
-            return {"tables": []}
\ No newline at end of file
+            return {"tables": []}
@@ -2,75 +2,203 @@ from sqlalchemy import text
 from config.app_config import AppConfig
 app_config = AppConfig()
 
-from .create_connection import CreateConnection
+from .engine_registry import engine_registry
+from .metadata_cache import metadata_cache
+from .result_cache import query_result_cache
+from .result_encoder import ResultEncoder
+from .db_query_checker import DatabaseQueryChecker
+from .query_timeout import aguarded_connection, guarded_connection
 from .set_current_schema import SetCurrentSchema
 
+class ResultBudget:
+    """
+    Tracks how many rows and (approximate) bytes of a result have been delivered.
+    """
+
+    def __init__(self, max_rows, max_bytes):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self.truncated_by = None
+
+    def take(self, partition) -> list:
+        """
+        Returns the rows of a partition that fit in the budget, as tuples.
+        Sets truncated_by once a row had to be dropped.
+        """
+        taken = []
+        for row in partition:
+            if self.rows >= self.max_rows:
+                self.truncated_by = "rows"
+                break
+            size = sum(len(str(value)) for value in row)
+            if self.bytes + size > self.max_bytes:
+                self.truncated_by = "bytes"
+                break
+            self.rows += 1
+            self.bytes += size
+            taken.append(tuple(row))
+        return taken
+
 class QueryDatabaseTable:
     """
     Class to query a specific table in a DB2 database.
     """
 
-    def __init__(self, query, schema):
+    def __init__(self, query, schema, timeout=None):
         self.query = query
         self.schema = schema
+        self.timeout = timeout
         self.output_format = app_config.OUTPUT_FORMAT
+        self.max_rows = app_config.QUERY_MAX_ROWS
+        self.max_bytes = app_config.QUERY_MAX_BYTES
+        self.fetch_size = app_config.QUERY_FETCH_SIZE
+        self.chunk_rows = app_config.QUERY_CHUNK_ROWS
+        self.enforce_guard = app_config.SQL_GUARD_ENFORCE
+        self.cacheable = False
+        self.sql = query
+        # Parsed by _analyze, only when the guard or the result cache needs it
+        self.checker = None
+        self.read_only = None
 
-    def list_of_dicts_to_markdown_table(self, data):
+    def _analyze(self) -> None:
+        """
+        Classifies the query with DatabaseQueryChecker. Skipped, together with the cost of
+        parsing, when neither SQL_GUARD_ENFORCE nor QUERY_CACHE_ENABLED is set.
         """
-        Converts a list of dictionaries to a Markdown formatted table string.
+        if self.checker is not None or not (self.enforce_guard or app_config.QUERY_CACHE_ENABLED):
+            return
+        # The LIMIT lets one row more through than is returned, so the row budget sees that
+        # the result was cut off and flags it as truncated
+        self.checker = DatabaseQueryChecker(query=self.query, max_limit=app_config.SQL_MAX_LIMIT + 1)
+        self.read_only = self.checker.is_read_only()
+        self.cacheable = app_config.QUERY_CACHE_ENABLED and self.read_only
+        # With the guard enforced, read-only queries run with the LIMIT applied by the checker
+        if self.enforce_guard and self.read_only:
+            self.sql = self.checker.analyze().rewritten
+            self.max_rows = min(self.max_rows, app_config.SQL_MAX_LIMIT)
 
-        Args:
-            data (list): A list of dictionaries, where each dictionary represents a row.
-                        All dictionaries should ideally have the same keys.
+    def _invalidate_caches(self) -> None:
+        if self.read_only:
+            return
+        # Writes make cached results of the touched tables stale
+        if self.checker is not None:
+            for table in self.checker.referenced_tables():
+                query_result_cache.invalidate(table)
+        # DDL changes the catalog, so cached table lists and columns are stale
+        words = self.query.split(None, 1)
+        if words and words[0].lower() in ("create", "alter", "drop", "rename"):
+            metadata_cache.invalidate(self.schema)
 
-        Returns:
-            str: A string representing the Markdown table.
-        """
-        if not data:
-            return ""
+    def _cached_result(self):
+        if not self.cacheable:
+            return None
+        return query_result_cache.get(self.schema, self.query)
 
-        # Get headers from the keys of the first dictionary
-        headers = list(data[0].keys())
+    def _cache_result(self, output) -> None:
+        if self.cacheable:
+            query_result_cache.set(self.schema, self.query, self.checker.referenced_tables(), output)
 
-        # Create the header row
-        header_row = "| " + " | ".join(headers) + " |"
+    def _format(self, columns, rows, budget) -> dict:
+        output = {"query_results": ResultEncoder(columns, self.output_format).encode(rows)}
+        if budget.truncated_by:
+            output["truncated"] = True
+            output["message"] = (
+                f"Result truncated after {budget.rows} rows ({budget.truncated_by} budget reached). "
+                "Add filters, aggregation or a LIMIT to the query to see the remaining data."
+            )
+        return output
 
-        # Create the separator row
-        separator_row = "| " + " | ".join(["---"] * len(headers)) + " |"
+    def exec_sql(self, on_chunk=None, canceller=None):
+        """
+        Streams the query result from a server-side cursor until the row or byte budget is reached.
+        on_chunk, if given, is called with the number of rows fetched so far after every
+        QUERY_CHUNK_ROWS rows, e.g. to report progress.
+        canceller, if given, is a QueryCanceller that can abort the statement from another thread.
+        """
+        try:
+            self._analyze()
+            cached = self._cached_result()
+            if cached is not None:
+                return cached
 
-        # Create the data rows
-        data_rows = []
-        for row_dict in data:
-            row_values = [str(row_dict.get(header, "")) for header in headers]
-            data_rows.append("| " + " | ".join(row_values) + " |")
+            engine = engine_registry.get_engine()
+            if engine is None:
+                return {"error": "DB connection failed"}
+
+            with guarded_connection(engine, self.timeout, canceller) as conn:
+                conn.execute(text(f"SET CURRENT SCHEMA {self.schema}"))
+                if self.enforce_guard:
+                    problem = self.checker.guard(conn)
+                    if problem:
+                        return {"error": problem}
+                result = conn.execution_options(
+                    stream_results=True, yield_per=self.fetch_size
+                ).execute(text(self.sql))
+                self._invalidate_caches()
+                columns = list(result.keys())
+                budget = ResultBudget(self.max_rows, self.max_bytes)
+                rows = []
+                try:
+                    for partition in result.partitions(self.chunk_rows):
+                        chunk = budget.take(partition)
+                        if chunk:
+                            rows.extend(chunk)
+                            if on_chunk is not None:
+                                on_chunk(budget.rows)
+                        if budget.truncated_by:
+                            break
+                finally:
+                    result.close()
+                output = self._format(columns, rows, budget)
+                self._cache_result(output)
+                return output
 
-        # Combine all parts
-        markdown_table = [header_row, separator_row] + data_rows
-        return "\n".join(markdown_table)
+        except Exception as e:
+            return {"error": str(e)}
 
-    def exec_sql(self):
+    async def aexec_sql(self, on_chunk=None):
+        """
+        Async counterpart of exec_sql. on_chunk, if given, must be a coroutine function.
+        """
         try:
-            engine = CreateConnection(
-                user=app_config.USER,
-                password=app_config.PASSWORD,
-                host=app_config.DB2_HOST,
-                port=app_config.DB2_PORT,
-                db_name=app_config.DB2_DATABASE,
-                ssl=app_config.SSL
-            ).create()
+            self._analyze()
+            cached = self._cached_result()
+            if cached is not None:
+                return cached
+
+            engine = await engine_registry.get_async_engine()
             if engine is None:
                 return {"error": "DB connection failed"}
 
-            with engine.connect() as conn:
-                conn.execute(text(f"SET CURRENT SCHEMA {self.schema}"))
-                result = conn.execute(text(self.query))
-                rows = [dict(row._mapping) for row in result]
-                if self.output_format == 'json':
-                    return {"query_results": rows}
-                elif self.output_format == 'md':
-                    return {"query_results": self.list_of_dicts_to_markdown_table(rows)}
-                else:
-                    return {"query_results": rows}
+            async with aguarded_connection(engine, self.timeout) as conn:
+                await conn.execute(text(f"SET CURRENT SCHEMA {self.schema}"))
+                if self.enforce_guard:
+                    problem = await conn.run_sync(self.checker.guard)
+                    if problem:
+                        return {"error": problem}
+                result = await conn.stream(
+                    text(self.sql), execution_options={"yield_per": self.fetch_size}
+                )
+                self._invalidate_caches()
+                columns = list(result.keys())
+                budget = ResultBudget(self.max_rows, self.max_bytes)
+                rows = []
+                try:
+                    async for partition in result.partitions(self.chunk_rows):
+                        chunk = budget.take(partition)
+                        if chunk:
+                            rows.extend(chunk)
+                            if on_chunk is not None:
+                                await on_chunk(budget.rows)
+                        if budget.truncated_by:
+                            break
+                finally:
+                    await result.close()
+                output = self._format(columns, rows, budget)
+                self._cache_result(output)
+                return output
 
         except Exception as e:
             return {"error": str(e)}
\ No newline at end of file
@@ -1,34 +1,279 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlalchemy import text
+from config.app_config import AppConfig
+app_config = AppConfig()
+
+# Table names following FROM/JOIN (reads) or INTO/UPDATE/TABLE (writes and DDL).
+# Only used for statements the parser cannot handle.
+_TABLE_REFERENCE = re.compile(r"\b(?:from|join|into|update|table)\s+([\w$#@.\"]+)", re.IGNORECASE)
+
+# Statement nodes that must not appear anywhere in an agent-submitted query
+_WRITE_NODES = (
+    exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Alter,
+    exp.TruncateTable, exp.Command, exp.Into, exp.Set, exp.Use, exp.Copy, exp.Grant,
+)
+
+_DML_NODES = (exp.Insert, exp.Update, exp.Delete, exp.Merge)
+
+# EXPLAIN output of PostgreSQL-style text plans: "(cost=0.00..431.00 rows=10000 ...)"
+_PLAN_COST = re.compile(r"cost=[\d.]+\.\.([\d.]+) rows=(\d+)")
+
+class QueryAnalysis(NamedTuple):
+    read_only: bool
+    problems: tuple
+    tables: frozenset
+    rewritten: Optional[str]
+    limited: bool = False
+
+def _first_word(query) -> str:
+    words = query.split(None, 1)
+    return words[0].lower() if words else ""
+
+def _where_links(select) -> list:
+    """
+    Returns the (qualifier, qualifier) pairs of the column equalities in the WHERE clause of
+    this select, e.g. ("o", "c") for o.customer_id = c.id. Unqualified columns link nothing.
+    """
+    where = select.args.get("where")
+    if where is None:
+        return []
+    links = []
+    for eq in where.find_all(exp.EQ):
+        if eq.find_ancestor(exp.Select) is not select:
+            continue
+        left, right = eq.left, eq.right
+        if isinstance(left, exp.Column) and isinstance(right, exp.Column) and left.table and right.table:
+            links.append((left.table.lower(), right.table.lower()))
+    return links
+
+def _cartesian_joins(expression) -> list:
+    """
+    Returns the tables joined without any join condition, i.e. cartesian products.
+    A comma or CROSS join counts as conditioned only if WHERE equalities link the table,
+    directly or through other tables, to the rest of the FROM clause.
+    """
+    tables = []
+    for select in expression.find_all(exp.Select):
+        joins = select.args.get("joins") or []
+        source = select.args.get("from") or select.args.get("from_")
+        if not joins or source is None:
+            continue
+        # Union-find over the names of the joined tables
+        parent = {}
+
+        def find(name):
+            parent.setdefault(name, name)
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        def union(a, b):
+            parent[find(a)] = find(b)
+
+        root = source.this.alias_or_name.lower()
+        find(root)
+        unconditioned = []
+        for join in joins:
+            name = join.this.alias_or_name.lower()
+            if (
+                join.args.get("on") or join.args.get("using")
+                or isinstance(join.this, (exp.Lateral, exp.Unnest))
+            ):
+                union(name, root)
+            else:
+                find(name)
+                unconditioned.append(join)
+        for left, right in _where_links(select):
+            union(left, right)
+        tables.extend(
+            join.this.sql() for join in unconditioned
+            if find(join.this.alias_or_name.lower()) != find(root)
+        )
+    return tables
+
+def _enforce_limit(expression, max_limit):
+    """
+    Returns the query with a LIMIT of at most max_limit on the outermost result,
+    and whether the LIMIT had to be added or lowered.
+    """
+    if expression.args.get("fetch") is not None:
+        return expression, False
+    limit = expression.args.get("limit")
+    if limit is None:
+        return expression.limit(max_limit), True
+    value = limit.expression
+    if isinstance(value, exp.Literal) and value.is_int and int(value.name) > max_limit:
+        return expression.limit(max_limit), True
+    return expression, False
+
+@lru_cache(maxsize=app_config.SQL_CHECK_CACHE_SIZE)
+def analyze_query(query, dialect=None, max_limit=None) -> QueryAnalysis:
+    """
+    Parses the query into an AST and classifies it. Results are memoized on the
+    (hashed) query text, so repeated checks of the same query cost a dict lookup.
+    """
+    try:
+        statements = [s for s in sqlglot.parse(query, read=dialect) if s is not None]
+    except SqlglotError as e:
+        tables = frozenset(name.rsplit(".", 1)[-1].strip('"').lower() for name in _TABLE_REFERENCE.findall(query))
+        return QueryAnalysis(False, (f"Query could not be parsed: {e}",), tables, None)
+
+    if not statements:
+        return QueryAnalysis(False, ("Query is empty.",), frozenset(), None)
+
+    ctes = {cte.alias_or_name.lower() for s in statements for cte in s.find_all(exp.CTE)}
+    tables = frozenset(
+        table.name.lower() for s in statements for table in s.find_all(exp.Table)
+        if table.name and table.name.lower() not in ctes
+    )
+
+    problems = []
+    if len(statements) > 1:
+        problems.append("Avoid using semicolons (;) in agent-submitted queries. Submit a single statement.")
+
+    expression = statements[0]
+    writes = [node for s in statements for node in s.find_all(*_WRITE_NODES)]
+    if writes:
+        node = writes[0]
+        if isinstance(node, exp.Into):
+            keyword = "SELECT INTO"
+        else:
+            keyword = _first_word(node.sql(dialect=dialect)).upper() or type(node).__name__.upper()
+        if isinstance(node, _DML_NODES):
+            problems.append(f"Execution of DML queries ('{keyword}') is not allowed.")
+        else:
+            problems.append(f"'{keyword}' statements are not allowed. Use SELECT, or WITH.")
+    elif not isinstance(expression, exp.Query):
+        problems.append(f"Query starts with '{_first_word(query)}', which is not allowed. Use SELECT, or WITH.")
+
+    read_only = not writes and len(statements) == 1 and isinstance(expression, exp.Query)
+    if not read_only:
+        return QueryAnalysis(False, tuple(problems), tables, None)
+
+    cartesian = _cartesian_joins(expression)
+    if cartesian:
+        problems.append(
+            f"Query joins {', '.join(cartesian)} without a join condition (cartesian product). "
+            "Add an ON clause, or a WHERE condition such as a.id = b.a_id relating the tables with qualified columns."
+        )
+
+    limited = False
+    if max_limit:
+        expression, limited = _enforce_limit(expression, max_limit)
+    return QueryAnalysis(True, tuple(problems), tables, expression.sql(dialect=dialect), limited)
+
 class DatabaseQueryChecker:
     """
     Class to check the validity of database queries.
     """
 
-    def __init__(self, query):
+    def __init__(self, query, dialect=None, max_limit=None, timeout=None, schema=None):
         self.query = query
+        self.timeout = timeout
+        self.schema = schema
+        self.dialect = dialect or app_config.SQL_DIALECT
+        self.max_limit = max_limit or app_config.SQL_MAX_LIMIT
 
-    def check(self) -> dict:
+    def analyze(self) -> QueryAnalysis:
+        return analyze_query(self.query.strip(), self.dialect, self.max_limit)
+
+    def is_read_only(self) -> bool:
+        """
+        True if the query is a single statement that only reads data.
+        """
+        return self.analyze().read_only
+
+    def referenced_tables(self) -> set:
+        """
+        Returns the lower-case, unqualified names of the tables the query refers to.
         """
-        Performs basic validation of the SQL query string.
-        Returns a natural language evaluation.
+        return set(self.analyze().tables)
+
+    def estimate(self, conn) -> dict:
+        """
+        Runs EXPLAIN for the (rewritten) query and returns the estimated rows and cost
+        when the database reports them. Supports MySQL-style tabular plans and
+        PostgreSQL-style text plans; other formats return an empty dict.
+        """
+        query = self.analyze().rewritten or self.query
+        result = conn.execute(text(f"EXPLAIN {query}"))
+        columns = [column.lower() for column in result.keys()]
+        plan = result.fetchall()
+        if "rows" in columns:
+            index = columns.index("rows")
+            rows = 1
+            for step in plan:
+                if step[index] is not None:
+                    rows *= int(step[index])
+            return {"rows": rows}
+        match = _PLAN_COST.search("\n".join(str(step[0]) for step in plan))
+        if match:
+            return {"cost": float(match.group(1)), "rows": int(match.group(2))}
+        return {}
+
+    def guard(self, conn=None) -> Optional[str]:
+        """
+        Returns the reason the query must not run, or None if it is acceptable.
+        With SQL_EXPLAIN_ENABLED and a connection, the plan estimate is checked as well.
+        """
+        analysis = self.analyze()
+        if analysis.problems:
+            return " ".join(analysis.problems)
+        if app_config.SQL_EXPLAIN_ENABLED and conn is not None:
+            estimate = self.estimate(conn)
+            if estimate.get("rows", 0) > app_config.SQL_MAX_ESTIMATED_ROWS:
+                return (
+                    f"Query rejected: the database estimates {estimate['rows']} rows, "
+                    f"over the limit of {app_config.SQL_MAX_ESTIMATED_ROWS}. Add filters or aggregation."
+                )
+            if estimate.get("cost", 0) > app_config.SQL_MAX_ESTIMATED_COST:
+                return (
+                    f"Query rejected: estimated cost {estimate['cost']:.0f} is over the limit of "
+                    f"{app_config.SQL_MAX_ESTIMATED_COST:.0f}. Add filters or aggregation."
+                )
+        return None
+
+    def check(self, canceller=None) -> dict:
+        """
+        Performs validation of the SQL query on its parsed syntax tree.
+        Returns a natural language evaluation and the query to execute.
         """
         self.query = self.query.strip()
         if not self.query:
-            return "Query is empty."
-
-        allowed_keywords = ["select", "with"]
-        dml_keywords = ["insert", "update", "delete"]
-        first_word = self.query.lower().split()[0]
-        if first_word in dml_keywords:
-            output = f"Execution of DML queries ('{first_word.upper()}') is not allowed."
-            return {"message": output}
-
-        if first_word not in allowed_keywords:
-            output = f"Query starts with '{first_word}', which is not allowed. Use SELECT, or WITH."
-            return {"message": output}
-
-        if ";" in self.query:
-            output = "Avoid using semicolons (;) in agent-submitted queries."
-            return {"message": output}
-        
+            return {"message": "Query is empty."}
+
+        # Syntax problems are reported as such, without touching the database
+        analysis = self.analyze()
+        if analysis.problems:
+            return {"message": " ".join(analysis.problems)}
+
+        problem = None
+        if app_config.SQL_EXPLAIN_ENABLED:
+            try:
+                from .engine_registry import engine_registry
+                from .query_timeout import guarded_connection
+                engine = engine_registry.get_engine()
+                if engine is None:
+                    return {"message": "DB connection failed, could not estimate the query cost."}
+                with guarded_connection(engine, self.timeout, canceller) as conn:
+                    # EXPLAIN resolves unqualified names against the same schema sql_db_query uses
+                    if self.schema:
+                        conn.execute(text(f"SET CURRENT SCHEMA {self.schema}"))
+                    problem = self.guard(conn)
+            except Exception as e:
+                return {"message": f"Could not estimate the query cost: {e}"}
+
+        if problem:
+            return {"message": problem}
+
         output = "Query appears syntactically valid. Ready to execute."
-        return {"message": output}
\ No newline at end of file
+        if analysis.limited:
+            output += f" A LIMIT of {self.max_limit} rows was applied; execute the returned query."
+        return {"message": output, "query": analysis.rewritten}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from sqlalchemy.engine import make_url
+from config.app_config import AppConfig
+app_config = AppConfig()
+
+from .create_connection import CreateConnection
+
+class EngineRegistry:
+    """
+    Process-wide registry of pooled SQLAlchemy engines, keyed by connection parameters.
+    Engines are created once (normally in the server lifespan) and shared by all tools.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._async_engines = {}
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+        self._async_supported = None
+
+    def _connection_params(self, **overrides) -> dict:
+        params = {
+            "user": app_config.USER,
+            "password": app_config.PASSWORD,
+            "host": app_config.DB2_HOST,
+            "port": app_config.DB2_PORT,
+            "db_name": app_config.DB2_DATABASE,
+            "ssl": app_config.SSL,
+        }
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return params
+
+    def _connection(self, params: dict, driver: str) -> CreateConnection:
+        return CreateConnection(
+            **params,
+            driver=driver,
+            pool_size=app_config.DB_POOL_SIZE,
+            max_overflow=app_config.DB_MAX_OVERFLOW,
+            pool_timeout=app_config.DB_POOL_TIMEOUT,
+            pool_recycle=app_config.DB_POOL_RECYCLE,
+            pool_pre_ping=app_config.DB_POOL_PRE_PING,
+        )
+
+    @property
+    def async_enabled(self) -> bool:
+        """
+        True if tools should use the AsyncEngine. Requires DB_ASYNC_MODE, an installed async
+        driver and an async engine that could connect; otherwise tools fall back to the sync
+        engine in a thread.
+        """
+        if not app_config.DB_ASYNC_MODE:
+            return False
+        if self._async_supported is None:
+            try:
+                dialect = make_url(f"{app_config.DB_ASYNC_DRIVER}://").get_dialect()
+                dialect.import_dbapi()
+                self._async_supported = bool(getattr(dialect, "is_async", False))
+            except Exception as e:
+                print(f"[Warning] Async driver '{app_config.DB_ASYNC_DRIVER}' unavailable, using thread pool: {e}")
+                self._async_supported = False
+        return self._async_supported
+
+    def get_engine(self, **overrides):
+        """
+        Returns the pooled engine for the given connection parameters, creating it on first use.
+        Parameters not passed explicitly default to the values from AppConfig.
+        Returns None if the engine could not be created.
+        """
+        params = self._connection_params(**overrides)
+        key = tuple(sorted(params.items()))
+
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._connection(params, app_config.DB_DRIVER).create()
+                if engine is not None:
+                    self._engines[key] = engine
+            return engine
+
+    async def get_async_engine(self, **overrides):
+        """
+        Async counterpart of get_engine, returning a pooled AsyncEngine.
+        Returns None if the engine could not be created.
+        """
+        params = self._connection_params(**overrides)
+        key = tuple(sorted(params.items()))
+
+        engine = self._async_engines.get(key)
+        if engine is not None:
+            return engine
+
+        async with self._async_lock:
+            engine = self._async_engines.get(key)
+            if engine is None:
+                engine = await self._connection(params, app_config.DB_ASYNC_DRIVER).create_async()
+                if engine is not None:
+                    self._async_engines[key] = engine
+                elif app_config.DB_ASYNC_MODE:
+                    print(f"[Warning] Async engine '{app_config.DB_ASYNC_DRIVER}' could not connect, using thread pool")
+                    self._async_supported = False
+            return engine
+
+    async def dispose_all(self) -> None:
+        """
+        Closes all pooled connections and forgets the registered engines.
+        """
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+        async with self._async_lock:
+            for engine in self._async_engines.values():
+                await engine.dispose()
+            self._async_engines.clear()
+
+# Shared registry for the whole process
+engine_registry = EngineRegistry()
@@ -1,21 +1,50 @@
-from sqlalchemy import inspect
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import column, select, table
 from config.app_config import AppConfig
 app_config = AppConfig()
 
-from .create_connection import CreateConnection
+from .engine_registry import engine_registry
+from .metadata_cache import metadata_cache
+from .query_timeout import aguarded_connection, guarded_connection
 from .set_current_schema import SetCurrentSchema
 
+# Sample rows of several tables are fetched concurrently, at most one query per pooled connection
+_sample_executor = ThreadPoolExecutor(max_workers=app_config.DB_POOL_SIZE, thread_name_prefix="table-samples")
+
 class GetTableSchema:
     """
-    Class to get the schema of a specific table in a DB2 database.
+    Class to get the schema and sample rows of one or more tables in a DB2 database.
     """
 
-    def __init__(self, table_name, schema):
+    def __init__(self, table_name, schema, timeout=None):
         self.table_name = table_name
         self.schema = schema
+        self.timeout = timeout
+        self.sample_rows = app_config.SCHEMA_SAMPLE_ROWS
+
+    def requested_tables(self, dialect=None) -> list:
+        """
+        Parses the comma-separated input into (schema, table) pairs.
+        Names may be qualified as SCHEMA.TABLE; otherwise the configured schema is used.
+        Table names are normalized the way the dialect's inspector reports them, so on DB2
+        'ORDERS' and 'orders' both match the (case-insensitive) ORDERS table.
+        """
+        requested = []
+        for name in self.table_name.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            schema, _, table_name = name.rpartition(".")
+            if dialect is not None and dialect.requires_name_normalize:
+                table_name = str(dialect.normalize_name(table_name))
+            key = (schema or self.schema, table_name)
+            if key not in requested:
+                requested.append(key)
+        return requested
 
-    def generate_sql_schema(self, fields):
-        sql = f"CREATE TABLE {self.table_name.upper()} (\n"
+    def generate_sql_schema(self, table_name, fields, primary_key=None):
+        sql = f"CREATE TABLE {table_name.upper()} (\n"
         field_lines = []
         for field in fields:
             name = field['name'].upper()
@@ -24,28 +53,141 @@ class GetTableSchema:
             if type_ == "NULL":
                 type_ = "TEXT"
             field_lines.append(f"    {name:<30} {type_}")
+        if primary_key:
+            field_lines.append(f"    PRIMARY KEY ({', '.join(col.upper() for col in primary_key)})")
         sql += ",\n".join(field_lines)
         sql += "\n);"
         return sql
-        
-    def get(self):
+
+    def generate_sample_rows(self, table_name, fields, rows):
+        if isinstance(rows, str):
+            return f"/*\n{rows}\n*/"
+        lines = [f"{len(rows)} rows from {table_name.upper()} table:"]
+        lines.append("\t".join(field['name'] for field in fields))
+        for row in rows:
+            lines.append("\t".join(str(value) for value in row))
+        return "/*\n" + "\n".join(lines) + "\n*/"
+
+    def _cached_metadata(self, requested) -> dict:
+        metadata = {}
+        for schema, table_name in requested:
+            cached = metadata_cache.get(schema, table_name)
+            if cached is not None:
+                metadata[(schema, table_name)] = cached
+        return metadata
+
+    def _misses_by_schema(self, requested, metadata) -> dict:
+        misses = {}
+        for schema, table_name in requested:
+            if (schema, table_name) not in metadata:
+                misses.setdefault(schema, []).append(table_name)
+        return misses
+
+    def _load_metadata(self, conn, misses) -> dict:
+        # One columns query and one keys query per schema, however many tables were requested
+        metadata = {}
+        for schema, tables in misses.items():
+            loaded = metadata_cache.load_tables(conn, schema, tables)
+            metadata.update({(schema, table_name): meta for table_name, meta in loaded.items()})
+        return metadata
+
+    def _sample_query(self, schema, table_name, meta):
+        columns = [column(field["name"]) for field in meta["columns"]]
+        return select(*columns).select_from(table(table_name, schema=schema)).limit(self.sample_rows)
+
+    def _fetch_samples(self, engine, canceller, schema, table_name, meta):
+        try:
+            with guarded_connection(engine, self.timeout, canceller) as conn:
+                return [tuple(row) for row in conn.execute(self._sample_query(schema, table_name, meta))]
+        except Exception as e:
+            return f"Could not fetch sample rows: {e}"
+
+    async def _afetch_samples(self, engine, schema, table_name, meta):
+        try:
+            async with aguarded_connection(engine, self.timeout) as conn:
+                result = await conn.execute(self._sample_query(schema, table_name, meta))
+                return [tuple(row) for row in result]
+        except Exception as e:
+            return f"Could not fetch sample rows: {e}"
+
+    def _format(self, requested, metadata, samples) -> dict:
+        sections = []
+        for key in requested:
+            schema, table_name = key
+            meta = metadata.get(key)
+            if meta is None:
+                sections.append(f"-- Table '{table_name}' not found in schema '{schema}'.")
+                continue
+            section = self.generate_sql_schema(table_name, meta["columns"], meta["primary_key"])
+            if key in samples:
+                section += "\n\n" + self.generate_sample_rows(table_name, meta["columns"], samples[key])
+            sections.append(section)
+        return {"table_schema": "\n\n".join(sections)}
+
+    def get(self, canceller=None):
         try:
-            engine = CreateConnection(
-                user=app_config.USER,
-                password=app_config.PASSWORD,
-                host=app_config.DB2_HOST,
-                port=app_config.DB2_PORT,
-                db_name=app_config.DB2_DATABASE,
-                ssl=app_config.SSL
-            ).create()
+            engine = engine_registry.get_engine()
             if engine is None:
                 return {"error": "DB connection failed"}
 
-            inspector = inspect(engine)
-            columns = inspector.get_columns(self.table_name, schema=self.schema)
-            
-            # return [{"name": col["name"], "type": str(col["type"])} for col in columns]
-            return {"table_schema": self.generate_sql_schema([{"name": col["name"], "type": str(col["type"])} for col in columns])}
+            requested = self.requested_tables(engine.dialect)
+            if not requested:
+                return {"error": "No table names given"}
+
+            metadata = self._cached_metadata(requested)
+            misses = self._misses_by_schema(requested, metadata)
+            if not misses and self.sample_rows <= 0:
+                return self._format(requested, metadata, {})
+
+            if misses:
+                with guarded_connection(engine, self.timeout, canceller) as conn:
+                    metadata.update(self._load_metadata(conn, misses))
+
+            samples = {}
+            found = [key for key in requested if key in metadata]
+            if self.sample_rows > 0 and found:
+                futures = {
+                    key: _sample_executor.submit(self._fetch_samples, engine, canceller, *key, metadata[key])
+                    for key in found
+                }
+                samples = {key: future.result() for key, future in futures.items()}
+            return self._format(requested, metadata, samples)
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def aget(self):
+        try:
+            engine = await engine_registry.get_async_engine()
+            if engine is None:
+                return {"error": "DB connection failed"}
+
+            requested = self.requested_tables(engine.dialect)
+            if not requested:
+                return {"error": "No table names given"}
+
+            metadata = self._cached_metadata(requested)
+            misses = self._misses_by_schema(requested, metadata)
+            if not misses and self.sample_rows <= 0:
+                return self._format(requested, metadata, {})
+
+            if misses:
+                async with aguarded_connection(engine, self.timeout) as conn:
+                    metadata.update(await conn.run_sync(self._load_metadata, misses))
+
+            samples = {}
+            found = [key for key in requested if key in metadata]
+            if self.sample_rows > 0 and found:
+                # At most DB_POOL_SIZE sample queries at a time, however many tables were requested
+                slots = asyncio.Semaphore(app_config.DB_POOL_SIZE)
+
+                async def fetch(key):
+                    async with slots:
+                        return await self._afetch_samples(engine, *key, metadata[key])
+
+                results = await asyncio.gather(*(fetch(key) for key in found))
+                samples = dict(zip(found, results))
+            return self._format(requested, metadata, samples)
 
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
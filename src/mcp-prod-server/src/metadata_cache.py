@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import bindparam, inspect, text
+from config.app_config import AppConfig
+app_config = AppConfig()
+
+# Catalog queries for dialects whose inspector reflects one table per query (PostgreSQL and
+# Oracle reflect many natively). Columns rows are (table, column, type, length, scale) and key
+# rows (table, column), both in column order; {tables} is replaced by the table name filter.
+_CATALOG_QUERIES = {
+    "ibm_db_sa": (
+        "SELECT TABNAME, COLNAME, TYPENAME, LENGTH, SCALE FROM SYSCAT.COLUMNS "
+        "WHERE TABSCHEMA = COALESCE(:schema, CURRENT SCHEMA) {tables} ORDER BY TABNAME, COLNO",
+        "SELECT k.TABNAME, k.COLNAME FROM SYSCAT.KEYCOLUSE k JOIN SYSCAT.TABCONST c "
+        "ON c.CONSTNAME = k.CONSTNAME AND c.TABSCHEMA = k.TABSCHEMA AND c.TABNAME = k.TABNAME "
+        "WHERE c.TYPE = 'P' AND k.TABSCHEMA = COALESCE(:schema, CURRENT SCHEMA) {tables} "
+        "ORDER BY k.TABNAME, k.COLSEQ",
+        "TABNAME",
+    ),
+    "mysql": (
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, NULL, NULL FROM INFORMATION_SCHEMA.COLUMNS "
+        "WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE()) {tables} ORDER BY TABLE_NAME, ORDINAL_POSITION",
+        "SELECT TABLE_NAME, COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE "
+        "WHERE CONSTRAINT_NAME = 'PRIMARY' AND TABLE_SCHEMA = COALESCE(:schema, DATABASE()) {tables} "
+        "ORDER BY TABLE_NAME, ORDINAL_POSITION",
+        "TABLE_NAME",
+    ),
+    "sqlite": (
+        "SELECT t.name, c.name, c.type, NULL, NULL FROM pragma_table_list t "
+        "JOIN pragma_table_info(t.name, t.schema) c "
+        "WHERE t.schema = COALESCE(:schema, 'main') AND t.type = 'table' AND t.name NOT LIKE 'sqlite_%' {tables} "
+        "ORDER BY t.name, c.cid",
+        "SELECT t.name, c.name FROM pragma_table_list t JOIN pragma_table_info(t.name, t.schema) c "
+        "WHERE t.schema = COALESCE(:schema, 'main') AND t.type = 'table' AND c.pk > 0 "
+        "AND t.name NOT LIKE 'sqlite_%' {tables} "
+        "ORDER BY t.name, c.pk",
+        "t.name",
+    ),
+}
+_CATALOG_QUERIES["db2"] = _CATALOG_QUERIES["ibm_db_sa"]
+
+# DB2 types reported with a length, or with precision and scale
+_SIZED_TYPES = {"CHARACTER", "VARCHAR", "GRAPHIC", "VARGRAPHIC", "BINARY", "VARBINARY"}
+_DECIMAL_TYPES = {"DECIMAL", "NUMERIC"}
+
+def _type_name(type_name, length, scale) -> str:
+    if length is not None and type_name in _SIZED_TYPES:
+        return f"{type_name}({length})"
+    if length is not None and type_name in _DECIMAL_TYPES:
+        return f"{type_name}({length}, {scale})"
+    return type_name
+
+class MetadataCache:
+    """
+    In-process cache of catalog metadata with TTL expiry and LRU eviction.
+    Keys are (schema, table); the table list of a schema is stored under (schema, None).
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema, table=None):
+        """
+        Returns the cached value, or None if it is missing or expired.
+        """
+        key = (schema, table)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, schema, table, value) -> None:
+        key = (schema, table)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, schema=None, table=None) -> None:
+        """
+        Drops cached entries. With no arguments the whole cache is cleared, with a schema
+        only that schema is cleared, and with a table only that table and the schema's table list.
+        """
+        with self._lock:
+            if schema is None and table is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                key_schema, key_table = key
+                if schema is not None and key_schema != schema:
+                    continue
+                if table is not None and key_table not in (None, table):
+                    continue
+                del self._entries[key]
+
+    def load_tables(self, conn, schema, tables=None) -> dict:
+        """
+        Fetches columns and primary keys of the given tables (or the whole schema if tables is None)
+        with one catalog query per kind, caches them and returns {table: metadata}.
+        Tables that do not exist are left out of the result.
+        Takes a sync connection, so it can also be used through AsyncConnection.run_sync.
+        """
+        if conn.dialect.name in _CATALOG_QUERIES:
+            columns, primary_keys = self._query_catalog(conn, schema, tables)
+        else:
+            columns, primary_keys = self._inspect_tables(conn, schema, tables)
+        loaded = {}
+        for table, cols in columns.items():
+            loaded[table] = {"columns": cols, "primary_key": primary_keys.get(table, [])}
+            self.set(schema, table, loaded[table])
+        return loaded
+
+    def _query_catalog(self, conn, schema, tables):
+        dialect = conn.dialect
+        normalize = dialect.requires_name_normalize
+        columns_sql, keys_sql, table_column = _CATALOG_QUERIES[dialect.name]
+        params = {"schema": dialect.denormalize_name(schema) if normalize and schema else schema}
+        table_filter = ""
+        if tables is not None:
+            table_filter = f"AND {table_column} IN :tables"
+            params["tables"] = [dialect.denormalize_name(t) if normalize else t for t in tables]
+
+        def run(sql):
+            statement = text(sql.format(tables=table_filter))
+            if tables is not None:
+                statement = statement.bindparams(bindparam("tables", expanding=True))
+            for row in conn.execute(statement, params):
+                yield [dialect.normalize_name(v) if normalize else v for v in row[:2]] + list(row[2:])
+
+        columns = {}
+        for table, name, type_name, length, scale in run(columns_sql):
+            columns.setdefault(table, []).append({"name": name, "type": _type_name(type_name, length, scale)})
+        primary_keys = {}
+        for table, name in run(keys_sql):
+            primary_keys.setdefault(table, []).append(name)
+        return columns, primary_keys
+
+    def _inspect_tables(self, conn, schema, tables):
+        inspector = inspect(conn)
+        multi_columns = inspector.get_multi_columns(schema=schema, filter_names=tables)
+        multi_keys = inspector.get_multi_pk_constraint(schema=schema, filter_names=tables)
+        columns = {
+            table: [{"name": col["name"], "type": str(col["type"])} for col in cols]
+            for (_, table), cols in multi_columns.items()
+        }
+        primary_keys = {
+            table: list(pk.get("constrained_columns") or []) for (_, table), pk in multi_keys.items()
+        }
+        return columns, primary_keys
+
+    def warm_up(self, conn, schema) -> int:
+        """
+        Loads the table list and the metadata of every table in the schema.
+        Returns the number of tables cached.
+        """
+        inspector = inspect(conn)
+        tables = inspector.get_table_names(schema=schema)
+        self.set(schema, None, tables)
+        self.load_tables(conn, schema)
+        return len(tables)
+
+# Shared cache for the whole process
+metadata_cache = MetadataCache(
+    ttl=app_config.METADATA_CACHE_TTL,
+    maxsize=app_config.METADATA_CACHE_SIZE,
+)
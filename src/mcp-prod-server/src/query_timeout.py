@@ -0,0 +1,209 @@
+import asyncio
+import contextvars
+import math
+import threading
+from contextlib import asynccontextmanager, contextmanager
+import anyio
+
+def apply_statement_timeout(conn, timeout) -> None:
+    """
+    Sets the server-side statement timeout of a sync connection, for drivers that support one.
+    The value is remembered on the pooled connection so it is only sent when it changes.
+    """
+    ms = int(timeout * 1000) if timeout else 0
+    if conn.info.get("statement_timeout_ms") == ms:
+        return
+    dialect = conn.dialect
+    if getattr(dialect, "is_mariadb", False):
+        conn.exec_driver_sql(f"SET SESSION max_statement_time = {ms / 1000}")
+    elif dialect.name == "mysql":
+        conn.exec_driver_sql(f"SET SESSION MAX_EXECUTION_TIME = {ms}")
+    elif dialect.name == "postgresql":
+        conn.exec_driver_sql(f"SET statement_timeout = {ms}")
+    elif dialect.name in ("ibm_db_sa", "db2"):
+        _set_db2_query_timeout(conn, ms)
+    else:
+        # No session-level timeout; the server-side deadline and QueryCanceller still apply
+        return
+    conn.info["statement_timeout_ms"] = ms
+
+def _set_db2_query_timeout(conn, ms) -> None:
+    # DB2 has no session statement timeout; SQL_ATTR_QUERY_TIMEOUT set on the connection is the
+    # default for every statement prepared on it afterwards, in whole seconds (0 = none)
+    try:
+        import ibm_db
+        conn.connection.dbapi_connection.set_option({ibm_db.SQL_ATTR_QUERY_TIMEOUT: math.ceil(ms / 1000)})
+    except Exception as e:
+        # Older drivers reject the attribute; the deadline then relies on QueryCanceller alone
+        print(f"[Warning] Could not set the DB2 query timeout: {e}")
+
+def _kill_mysql_query(engine, thread_id) -> None:
+    # A dedicated connection outside the pool, so cancelling works even when the pool is exhausted
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    killer = engine.dialect.connect(*cargs, **cparams)
+    try:
+        cursor = killer.cursor()
+        cursor.execute(f"KILL QUERY {int(thread_id)}")
+        cursor.close()
+    finally:
+        killer.close()
+
+class QueryCanceller:
+    """
+    Lets the event loop cancel statements running on sync connections in worker threads,
+    e.g. when the MCP request is cancelled or its deadline passes.
+    """
+
+    def __init__(self):
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def attach(self, conn) -> None:
+        with self._lock:
+            self._connections.add(conn)
+
+    def detach(self, conn) -> None:
+        with self._lock:
+            self._connections.discard(conn)
+
+    def cancel(self) -> None:
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                dbapi_conn = conn.connection.dbapi_connection
+                if hasattr(dbapi_conn, "cancel"):
+                    # psycopg and similar drivers can cancel from another thread
+                    dbapi_conn.cancel()
+                elif hasattr(dbapi_conn, "interrupt"):
+                    dbapi_conn.interrupt()
+                elif conn.dialect.name == "mysql" and hasattr(dbapi_conn, "thread_id"):
+                    _kill_mysql_query(conn.engine, dbapi_conn.thread_id())
+            except Exception as e:
+                print(f"[Error] Could not cancel running query: {e}")
+
+@contextmanager
+def guarded_connection(engine, timeout=None, canceller=None):
+    """
+    Checks out a pooled connection with the statement timeout applied and,
+    if given, registered with the canceller for the duration of the block.
+    """
+    with engine.connect() as conn:
+        apply_statement_timeout(conn, timeout)
+        if canceller is not None:
+            canceller.attach(conn)
+        try:
+            yield conn
+        finally:
+            if canceller is not None:
+                canceller.detach(conn)
+
+# Interrupts of the statements running under run_async_with_timeout, so its deadline can stop them
+_async_interrupts = contextvars.ContextVar("async_interrupts", default=None)
+
+# Seconds an interrupted statement gets to fail on its own before the tool call is cancelled
+_INTERRUPT_GRACE = 1.0
+
+@asynccontextmanager
+async def aguarded_connection(engine, timeout=None):
+    """
+    Async counterpart of guarded_connection. Cancelling the awaiting task cancels the statement.
+    """
+    conn = await engine.connect().start()
+    interrupts = _async_interrupts.get()
+    interrupt = None
+    try:
+        await conn.run_sync(apply_statement_timeout, timeout)
+        interrupt = driver_interrupt(conn)
+        if interrupt is not None and interrupts is not None:
+            interrupts.add(interrupt)
+        yield conn
+    except anyio.get_cancelled_exc_class():
+        # The cancelling scope stays active while this runs; shielded, so the statement is
+        # interrupted and the connection given back to the pool instead of leaked
+        with anyio.CancelScope(shield=True):
+            if interrupt is not None:
+                interrupt()
+            await _release(conn)
+        raise
+    except BaseException:
+        await _release(conn)
+        raise
+    else:
+        await _release(conn)
+    finally:
+        if interrupts is not None:
+            interrupts.discard(interrupt)
+
+async def _release(conn) -> None:
+    try:
+        await conn.close()
+    except Exception as e:
+        # SQLAlchemy already discards the driver connection when a statement is cancelled
+        print(f"[Warning] Could not close the database connection: {e}")
+
+def driver_interrupt(conn):
+    """
+    Drivers that run a blocking connection on their own thread (aiosqlite) keep executing
+    after the awaiting task is cancelled; returns the call that interrupts the statement, if any.
+    """
+    try:
+        raw = getattr(conn.sync_connection.connection.driver_connection, "_conn", None)
+    except Exception:
+        return None
+    return getattr(raw, "interrupt", None)
+
+def _timeout_error(timeout) -> dict:
+    return {"error": f"Query timed out after {timeout:g} seconds. Narrow the query or add filters and retry."}
+
+async def run_sync_with_timeout(func, timeout):
+    """
+    Runs func(canceller=...) in a worker thread with a deadline. If the deadline passes or the
+    calling request is cancelled, the running statement is cancelled and the thread is abandoned.
+    """
+    canceller = QueryCanceller()
+    try:
+        with anyio.fail_after(timeout or None):
+            return await anyio.to_thread.run_sync(
+                lambda: func(canceller=canceller), abandon_on_cancel=True
+            )
+    except TimeoutError:
+        await anyio.to_thread.run_sync(canceller.cancel)
+        return _timeout_error(timeout)
+    except anyio.get_cancelled_exc_class():
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(canceller.cancel)
+        raise
+
+async def run_async_with_timeout(func, timeout):
+    """
+    Awaits func() with a deadline. When it passes, statements the driver can interrupt are
+    interrupted, so they fail and their connections go back to the pool as usual; whatever is
+    still running after a short grace period is cancelled.
+    """
+    if not timeout:
+        return await func()
+    interrupts = set()
+    expired = False
+
+    def expire():
+        nonlocal expired
+        expired = True
+        for interrupt in list(interrupts):
+            interrupt()
+
+    token = _async_interrupts.set(interrupts)
+    timer = asyncio.get_running_loop().call_later(timeout, expire)
+    try:
+        with anyio.move_on_after(timeout + _INTERRUPT_GRACE):
+            result = await func()
+    except Exception:
+        # Raised by the interrupted statement, unless the tool handles it itself
+        if not expired:
+            raise
+    finally:
+        timer.cancel()
+        _async_interrupts.reset(token)
+    if expired:
+        return _timeout_error(timeout)
+    return result
@@ -0,0 +1,120 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from config.app_config import AppConfig
+app_config = AppConfig()
+
+# Quoted literals/identifiers are kept as-is, whitespace elsewhere is collapsed
+_SQL_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+")
+
+def normalize_sql(query) -> str:
+    """
+    Collapses whitespace outside of quoted literals so that formatting differences
+    do not produce different cache keys.
+    """
+    def replace(match):
+        token = match.group(0)
+        return " " if token.isspace() else token
+    return _SQL_TOKEN.sub(replace, query).strip().rstrip(";").strip()
+
+class QueryResultCache:
+    """
+    Memory-bounded LRU cache of query results with TTL expiry and per-table invalidation.
+    Keys are (schema, normalized SQL). Results are stored JSON-encoded, so every hit returns
+    a fresh copy that callers can modify without touching the cache.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _key(self, schema, query):
+        return (schema, normalize_sql(query))
+
+    def get(self, schema, query):
+        """
+        Returns a copy of the cached result, or None on a miss.
+        """
+        key = self._key(schema, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            encoded = entry[1]
+        return json.loads(encoded)
+
+    def set(self, schema, query, tables, value) -> None:
+        """
+        Stores a result. tables are the (lower-case) table names the query reads,
+        used by invalidate(table=...).
+        """
+        key = self._key(schema, query)
+        encoded = json.dumps(value, default=str)
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, encoded, size, tables)
+            self._bytes += size
+            for table in tables:
+                self._tables.setdefault(table, set()).add(key)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, table=None) -> None:
+        """
+        Drops every cached result that reads the given table, or the whole cache if table is None.
+        """
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._tables.clear()
+                self._bytes = 0
+                return
+            for key in list(self._tables.get(table.lower(), ())):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key) -> None:
+        _, _, size, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._tables.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tables[table]
+
+# Shared cache for the whole process
+query_result_cache = QueryResultCache(
+    ttl=app_config.QUERY_CACHE_TTL,
+    max_bytes=app_config.QUERY_CACHE_MAX_BYTES,
+)
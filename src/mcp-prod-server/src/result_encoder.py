@@ -0,0 +1,169 @@
+import csv
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import orjson
+
+def _decimal_text(value) -> str:
+    # Fixed-point notation, so Decimal("1E+2") reads as "100" rather than in exponent form
+    return format(value, "f")
+
+def _bytes_text(value) -> str:
+    return bytes(value).hex()
+
+# Conversions of non-string database values to text, looked up by exact type
+_TEXT_CONVERTERS = {
+    str: str,
+    int: str,
+    float: repr,
+    bool: str,
+    Decimal: _decimal_text,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    datetime.timedelta: str,
+    bytes: _bytes_text,
+    bytearray: _bytes_text,
+    memoryview: _bytes_text,
+    uuid.UUID: str,
+}
+
+def cell_text(value) -> str:
+    """
+    Returns the text form of a single result value, as used by the Markdown and CSV formats.
+    NULL becomes an empty string, Decimal keeps its exact digits and bytes are hex encoded.
+    """
+    if value is None:
+        return ""
+    convert = _TEXT_CONVERTERS.get(type(value))
+    return convert(value) if convert is not None else str(value)
+
+def column_text(column) -> list:
+    """
+    Returns the text form of every value of one result column. The conversion is chosen once
+    per column when all its values share a type, instead of once per cell.
+    """
+    types = set(map(type, column))
+    if len(types) == 1:
+        column_type = types.pop()
+        if column_type is str:
+            return list(column)
+        convert = _TEXT_CONVERTERS.get(column_type)
+        if convert is not None:
+            return list(map(convert, column))
+    return list(map(cell_text, column))
+
+def _markdown_column(column) -> list:
+    texts = column_text(column)
+    # Pipes and line breaks would break the table; check the whole column at once
+    joined = "\0".join(texts)
+    if "|" in joined or "\n" in joined:
+        texts = [text.replace("|", "\\|").replace("\r\n", " ").replace("\n", " ") for text in texts]
+    return texts
+
+# Types a JSON encoder handles as is; columns holding only these are passed through untouched
+_JSON_NATIVE = frozenset((str, int, float, bool, type(None)))
+
+def _json_default(value):
+    # Called by orjson only for types it has no native encoding for
+    if isinstance(value, Decimal):
+        return _decimal_text(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _bytes_text(value)
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    raise TypeError
+
+def _json_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return cell_text(value)
+
+def _json_column(column) -> list:
+    """
+    Returns one result column with its values made JSON-native. orjson encodes dates and UUIDs
+    natively and falls back to _json_default for Decimal, bytes and intervals.
+    """
+    try:
+        return orjson.loads(orjson.dumps(column, default=_json_default))
+    except (orjson.JSONEncodeError, TypeError):
+        # e.g. integers beyond 64 bits, or driver-specific types orjson cannot encode
+        return [_json_value(value) for value in column]
+
+class ResultEncoder:
+    """
+    Encodes query results given as column names and row tuples, without building a dict per row
+    unless the output format requires one.
+
+    Formats:
+        json     list of objects, one per row (the default)
+        compact  {"columns": [...], "rows": [[...], ...]}; column names are sent once
+        md       Markdown table
+        csv      CSV text with a header line
+    """
+
+    FORMATS = ("json", "compact", "md", "csv")
+
+    def __init__(self, columns, output_format="json"):
+        self.columns = [str(name) for name in columns]
+        if output_format not in self.FORMATS:
+            print(f"[Warning] Unknown output format '{output_format}', using json")
+            output_format = "json"
+        self.output_format = output_format
+
+    def json_rows(self, rows) -> list:
+        """
+        Returns the rows with every value JSON-native. Only columns holding other types
+        (Decimal, dates, bytes, UUIDs, ...) are converted; when there are none the row tuples
+        are returned as they are, without any encoding.
+        """
+        if not rows:
+            return []
+        columns = list(zip(*rows))
+        converted = False
+        for index, column in enumerate(columns):
+            if not _JSON_NATIVE.issuperset(map(type, column)):
+                columns[index] = _json_column(column)
+                converted = True
+        return list(zip(*columns)) if converted else list(rows)
+
+    def to_json(self, rows) -> list:
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.json_rows(rows)]
+
+    def to_compact(self, rows) -> dict:
+        return {"columns": self.columns, "rows": self.json_rows(rows)}
+
+    def to_markdown(self, rows) -> str:
+        if not rows:
+            return ""
+        lines = [
+            "| " + " | ".join(self.columns) + " |",
+            "| " + " | ".join(["---"] * len(self.columns)) + " |",
+        ]
+        # Convert column by column, then stitch the cells back into lines
+        cells = [_markdown_column(column) for column in zip(*rows)]
+        lines.extend("| " + " | ".join(row) + " |" for row in zip(*cells))
+        return "\n".join(lines)
+
+    def to_csv(self, rows) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.columns)
+        cells = [column_text(column) for column in zip(*rows)]
+        writer.writerows(zip(*cells))
+        return buffer.getvalue()
+
+    def encode(self, rows):
+        """
+        Encodes a list of row tuples in the configured format.
+        """
+        if self.output_format == "compact":
+            return self.to_compact(rows)
+        if self.output_format == "md":
+            return self.to_markdown(rows)
+        if self.output_format == "csv":
+            return self.to_csv(rows)
+        return self.to_json(rows)
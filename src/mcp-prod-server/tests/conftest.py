@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the server modules the way mcp_server.py does: config.* and src.*
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
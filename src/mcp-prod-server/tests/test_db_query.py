@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, event
+
+from src import db_query
+from src.db_query import QueryDatabaseTable
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def set_schema(conn, cursor, statement, parameters, context, executemany):
+        # SQLite has no schemas; stand in for DB2's SET CURRENT SCHEMA
+        if statement.startswith("SET CURRENT SCHEMA"):
+            return "SELECT 1", parameters
+        return statement, parameters
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE orders (id INTEGER)")
+        conn.exec_driver_sql("INSERT INTO orders (id) VALUES " + ", ".join(f"({i})" for i in range(25)))
+    monkeypatch.setattr(db_query.engine_registry, "get_engine", lambda: engine)
+    monkeypatch.setattr(db_query.app_config, "OUTPUT_FORMAT", "json")
+    monkeypatch.setattr(db_query.app_config, "QUERY_CACHE_ENABLED", False)
+    return engine
+
+def test_guard_limit_flags_truncated_results(engine, monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", True)
+    monkeypatch.setattr(db_query.app_config, "SQL_MAX_LIMIT", 10)
+    tool = QueryDatabaseTable("SELECT id FROM orders ORDER BY id", "APP")
+    result = tool.exec_sql()
+    assert tool.sql.endswith("LIMIT 11")
+    assert [row["id"] for row in result["query_results"]] == list(range(10))
+    assert result["truncated"] is True
+    assert "after 10 rows" in result["message"]
+
+def test_guard_limit_does_not_flag_complete_results(engine, monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", True)
+    monkeypatch.setattr(db_query.app_config, "SQL_MAX_LIMIT", 25)
+    result = QueryDatabaseTable("SELECT id FROM orders", "APP").exec_sql()
+    assert len(result["query_results"]) == 25
+    assert "truncated" not in result
+
+def test_results_are_one_list_with_progress_per_chunk(engine, monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", False)
+    monkeypatch.setattr(db_query.app_config, "QUERY_CHUNK_ROWS", 10)
+    progress = []
+    result = QueryDatabaseTable("SELECT id FROM orders", "APP").exec_sql(on_chunk=progress.append)
+    assert len(result["query_results"]) == 25
+    assert progress == [10, 20, 25]
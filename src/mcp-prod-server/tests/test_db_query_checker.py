@@ -0,0 +1,126 @@
+import pytest
+
+from src import db_query
+from src.db_query import QueryDatabaseTable
+from src.db_query_checker import DatabaseQueryChecker, analyze_query
+
+def test_select_gets_limit():
+    analysis = analyze_query("SELECT id FROM orders", None, 100)
+    assert analysis.read_only
+    assert analysis.problems == ()
+    assert analysis.limited
+    assert analysis.rewritten == "SELECT id FROM orders LIMIT 100"
+
+def test_lower_limit_is_kept():
+    analysis = analyze_query("SELECT id FROM orders LIMIT 5", None, 100)
+    assert not analysis.limited
+    assert analysis.rewritten == "SELECT id FROM orders LIMIT 5"
+
+def test_higher_limit_is_lowered():
+    analysis = analyze_query("SELECT id FROM orders LIMIT 5000", None, 100)
+    assert analysis.limited
+    assert analysis.rewritten.endswith("LIMIT 100")
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM orders",
+    "UPDATE orders SET total = 0",
+    "DROP TABLE orders",
+    "SELECT * INTO copy FROM orders",
+    "SELECT 1; DELETE FROM orders",
+])
+def test_writes_are_rejected(query):
+    analysis = analyze_query(query, None, 100)
+    assert not analysis.read_only
+    assert analysis.problems
+    assert analysis.rewritten is None
+
+@pytest.mark.parametrize("query", ["SELECT 'abc", "SELECT * FROM (", "SELEC id FROM orders"])
+def test_unparseable_query_is_reported(query):
+    analysis = analyze_query(query, None, 100)
+    assert not analysis.read_only
+    assert analysis.problems
+
+def test_check_reports_tokenizer_error_as_syntax_problem():
+    result = DatabaseQueryChecker("SELECT 'abc").check()
+    assert "query" not in result
+    assert "could not be parsed" in result["message"]
+    assert "cost" not in result["message"]
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM orders o JOIN customers c ON o.customer_id = c.id",
+    "SELECT * FROM orders o, customers c WHERE o.customer_id = c.id",
+    "SELECT * FROM orders, customers WHERE orders.customer_id = customers.id",
+    # c is linked to i through o
+    "SELECT * FROM orders o, customers c, items i WHERE o.customer_id = c.id AND i.order_id = o.id",
+])
+def test_joined_tables_pass(query):
+    assert analyze_query(query, None, 100).problems == ()
+
+@pytest.mark.parametrize("query, table", [
+    ("SELECT * FROM orders, customers", "customers"),
+    ("SELECT * FROM orders CROSS JOIN customers", "customers"),
+    # The equality does not relate the two joined tables
+    ("SELECT * FROM orders o, customers c WHERE o.id = o.parent_id", "customers"),
+    ("SELECT * FROM orders o, customers c, items i WHERE o.customer_id = c.id", "items"),
+    # An equality inside a subquery does not condition the outer join
+    ("SELECT * FROM orders o, customers c WHERE o.id IN (SELECT i.order_id FROM items i, notes n WHERE i.id = n.item_id)", "customers"),
+])
+def test_cartesian_join_is_rejected(query, table):
+    analysis = analyze_query(query, None, 100)
+    assert len(analysis.problems) == 1
+    assert "cartesian product" in analysis.problems[0]
+    assert table in analysis.problems[0]
+
+def test_referenced_tables_skip_ctes():
+    checker = DatabaseQueryChecker("WITH recent AS (SELECT * FROM Orders) SELECT * FROM recent JOIN app.customers c ON 1 = 1")
+    assert checker.referenced_tables() == {"orders", "customers"}
+
+def test_query_is_not_parsed_without_guard_or_cache(monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", False)
+    monkeypatch.setattr(db_query.app_config, "QUERY_CACHE_ENABLED", False)
+    monkeypatch.setattr(db_query.engine_registry, "get_engine", lambda: None)
+    tool = QueryDatabaseTable("SELECT 'abc", "APP")
+    assert tool.exec_sql() == {"error": "DB connection failed"}
+    assert tool.checker is None
+    assert tool.sql == "SELECT 'abc"
+
+def test_guard_rewrites_read_only_query(monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", True)
+    monkeypatch.setattr(db_query.engine_registry, "get_engine", lambda: None)
+    tool = QueryDatabaseTable("SELECT id FROM orders", "APP")
+    tool.exec_sql()
+    assert tool.read_only
+    assert tool.sql == f"SELECT id FROM orders LIMIT {tool.checker.max_limit}"
+
+def test_unparseable_query_does_not_raise(monkeypatch):
+    monkeypatch.setattr(db_query.app_config, "SQL_GUARD_ENFORCE", True)
+    monkeypatch.setattr(db_query.engine_registry, "get_engine", lambda: None)
+    tool = QueryDatabaseTable("SELECT 'abc", "APP")
+    assert "error" in tool.exec_sql()
+    assert tool.read_only is False
+    assert tool.sql == "SELECT 'abc"
+
+def test_explain_runs_in_configured_schema(monkeypatch):
+    from sqlalchemy import create_engine, event
+    from src import db_query_checker
+
+    engine = create_engine("sqlite://")
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        # SQLite has no schemas; stand in for DB2's SET CURRENT SCHEMA
+        if statement.startswith("SET CURRENT SCHEMA"):
+            return "SELECT 1", parameters
+        return statement, parameters
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE orders (id INTEGER)")
+    statements.clear()
+    monkeypatch.setattr(db_query_checker.app_config, "SQL_EXPLAIN_ENABLED", True)
+    monkeypatch.setattr(db_query.engine_registry, "get_engine", lambda: engine)
+    result = DatabaseQueryChecker("SELECT id FROM orders", schema="APP").check()
+    assert result["query"] == f"SELECT id FROM orders LIMIT {db_query_checker.app_config.SQL_MAX_LIMIT}"
+    assert statements[0] == "SET CURRENT SCHEMA APP"
+    assert statements[1].startswith("EXPLAIN SELECT id FROM orders")
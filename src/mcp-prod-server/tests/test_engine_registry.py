@@ -0,0 +1,25 @@
+import asyncio
+
+from sqlalchemy.dialects import mysql, sqlite
+
+from src import engine_registry as registry_module
+from src.create_connection import _PROBE
+from src.engine_registry import EngineRegistry
+
+def test_probe_compiles_for_each_dialect():
+    assert str(_PROBE.compile(dialect=mysql.dialect())) == "SELECT 1"
+    assert str(_PROBE.compile(dialect=sqlite.dialect())) == "SELECT 1"
+
+def test_async_mode_falls_back_when_the_engine_cannot_connect(monkeypatch):
+    monkeypatch.setattr(registry_module.app_config, "DB_ASYNC_MODE", True)
+    monkeypatch.setattr(registry_module.app_config, "DB_ASYNC_DRIVER", "sqlite+aiosqlite")
+
+    class FailingConnection:
+        async def create_async(self):
+            return None
+
+    registry = EngineRegistry()
+    monkeypatch.setattr(registry, "_connection", lambda params, driver: FailingConnection())
+    assert registry.async_enabled
+    assert asyncio.run(registry.get_async_engine()) is None
+    assert not registry.async_enabled
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, event, text
+
+from src.metadata_cache import MetadataCache, _type_name
+
+def make_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total DECIMAL(10, 2))"))
+        conn.execute(text("CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(50))"))
+        conn.execute(text("CREATE TABLE order_lines (line INTEGER, order_id INTEGER, sku TEXT, PRIMARY KEY (order_id, line))"))
+        conn.execute(text("CREATE VIEW big_orders AS SELECT * FROM orders WHERE total > 100"))
+    return engine
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+def test_load_tables_uses_two_catalog_queries(tmp_path):
+    engine = make_engine(tmp_path)
+    statements = count_statements(engine)
+    cache = MetadataCache(ttl=60, maxsize=100)
+    with engine.connect() as conn:
+        loaded = cache.load_tables(conn, None, ["orders", "customers", "order_lines", "missing"])
+    assert len(statements) == 2
+    assert set(loaded) == {"orders", "customers", "order_lines"}
+    assert loaded["orders"]["columns"] == [
+        {"name": "id", "type": "INTEGER"},
+        {"name": "customer_id", "type": "INTEGER"},
+        {"name": "total", "type": "DECIMAL(10, 2)"},
+    ]
+    assert loaded["orders"]["primary_key"] == ["id"]
+    assert loaded["order_lines"]["primary_key"] == ["order_id", "line"]
+    assert cache.get(None, "customers") == loaded["customers"]
+
+def test_load_whole_schema(tmp_path):
+    engine = make_engine(tmp_path)
+    statements = count_statements(engine)
+    cache = MetadataCache(ttl=60, maxsize=100)
+    with engine.connect() as conn:
+        loaded = cache.load_tables(conn, None)
+    assert len(statements) == 2
+    # Views are listed by list_tables separately; only tables are loaded
+    assert set(loaded) == {"orders", "customers", "order_lines"}
+
+def test_warm_up(tmp_path):
+    engine = make_engine(tmp_path)
+    cache = MetadataCache(ttl=60, maxsize=100)
+    with engine.connect() as conn:
+        assert cache.warm_up(conn, None) == 3
+    assert sorted(cache.get(None)) == ["customers", "order_lines", "orders"]
+    assert cache.get(None, "order_lines")["primary_key"] == ["order_id", "line"]
+
+def test_db2_type_names():
+    assert _type_name("VARCHAR", 50, 0) == "VARCHAR(50)"
+    assert _type_name("DECIMAL", 10, 2) == "DECIMAL(10, 2)"
+    assert _type_name("INTEGER", 4, 0) == "INTEGER"
+    assert _type_name("int(11)", None, None) == "int(11)"
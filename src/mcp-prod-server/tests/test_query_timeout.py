@@ -0,0 +1,50 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.query_timeout import aguarded_connection, run_async_with_timeout
+
+# Never finishes on its own; only an interrupt stops it
+ENDLESS = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n"
+
+def query(engine, sql):
+    async def run():
+        async with aguarded_connection(engine, 0.2) as conn:
+            return (await conn.execute(text(sql))).scalar()
+    return run
+
+def test_async_timeout_returns_the_connection_to_the_pool(tmp_path):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+        try:
+            result = await run_async_with_timeout(query(engine, ENDLESS), 0.2)
+            assert "timed out" in result["error"]
+            assert engine.sync_engine.pool.checkedout() == 0
+            # The pooled connection is still usable
+            assert await run_async_with_timeout(query(engine, "SELECT 1"), 0.2) == 1
+            assert engine.sync_engine.pool.checkedout() == 0
+        finally:
+            await engine.dispose()
+
+    asyncio.run(asyncio.wait_for(main(), 10))
+
+def test_async_timeout_of_a_handled_failure(tmp_path):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+
+        async def tool():
+            # Tools turn driver errors into an error result themselves
+            try:
+                return await query(engine, ENDLESS)()
+            except Exception as e:
+                return {"error": str(e)}
+
+        try:
+            result = await run_async_with_timeout(tool, 0.2)
+            assert "timed out" in result["error"]
+            assert engine.sync_engine.pool.checkedout() == 0
+        finally:
+            await engine.dispose()
+
+    asyncio.run(asyncio.wait_for(main(), 10))
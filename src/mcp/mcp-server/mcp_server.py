@@ -1,11 +1,20 @@
 # Import depdendencies
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
 
+@asynccontextmanager
+async def lifespan(server):
+    # One keep-alive HTTP client for all tool calls, closed on shutdown.
+    # Imported here because importing the tools package needs `mcp` to exist.
+    from tools.http_client import create_http_client
+    async with create_http_client() as http:
+        yield {"http": http}
+
 # Server created
-mcp = FastMCP("Utility Tools")
+mcp = FastMCP("Utility Tools", lifespan=lifespan)
 
 # Import all the tools
 from tools import *
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio") # change the transport to "sse" to deploy as remote MCP server
\ No newline at end of file
+    mcp.run(transport="stdio") # change the transport to "sse" to deploy as remote MCP server
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the server the way `python mcp_server.py` does; the tools package needs `mcp` to exist
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mcp_server  # noqa: E402,F401
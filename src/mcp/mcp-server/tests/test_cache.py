@@ -0,0 +1,134 @@
+import asyncio
+import importlib
+import logging
+
+import pytest
+
+cache_module = importlib.import_module("tools.cache")
+from tools.cache import SQLiteStore, StaleWhileRevalidateCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+class Fetcher:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+async def settle():
+    # Lets background refresh tasks run to completion
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_fresh_value_is_served_without_fetching(clock):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60, stale_ttl=300)
+        fetch = Fetcher("v1", "v2")
+        assert await cache.get("k", fetch) == "v1"
+        clock.now += 59
+        assert await cache.get("k", fetch) == "v1"
+        assert fetch.calls == 1
+
+    asyncio.run(main())
+
+def test_stale_value_is_served_while_refreshing(clock):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60, stale_ttl=300)
+        fetch = Fetcher("v1", "v2")
+        await cache.get("k", fetch)
+        clock.now += 61
+        assert await cache.get("k", fetch) == "v1"
+        # Further stale reads while the refresh runs do not start another one
+        assert await cache.get("k", fetch) == "v1"
+        await settle()
+        assert fetch.calls == 2
+        assert await cache.get("k", fetch) == "v2"
+        assert fetch.calls == 2
+
+    asyncio.run(main())
+
+def test_expired_value_is_fetched_again(clock):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60, stale_ttl=300)
+        fetch = Fetcher("v1", "v2")
+        await cache.get("k", fetch)
+        clock.now += 361
+        assert await cache.get("k", fetch) == "v2"
+        assert fetch.calls == 2
+
+    asyncio.run(main())
+
+def test_failed_refresh_keeps_the_stale_value(clock, caplog):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60, stale_ttl=300)
+        fetch = Fetcher("v1", RuntimeError("upstream down"), "v2")
+        await cache.get("k", fetch)
+        clock.now += 61
+        assert await cache.get("k", fetch) == "v1"
+        await settle()
+        assert fetch.calls == 2
+        # Still stale, so the next read serves v1 and retries the refresh
+        assert await cache.get("k", fetch) == "v1"
+        await settle()
+        assert await cache.get("k", fetch) == "v2"
+
+    with caplog.at_level(logging.WARNING, logger=cache_module.__name__):
+        asyncio.run(main())
+    assert "upstream down" in caplog.text
+
+def test_failed_fetch_without_a_value_raises(clock):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60)
+        fetch = Fetcher(RuntimeError("upstream down"), "v1")
+        with pytest.raises(RuntimeError):
+            await cache.get("k", fetch)
+        assert await cache.get("k", fetch) == "v1"
+
+    asyncio.run(main())
+
+def test_concurrent_misses_share_one_fetch(clock):
+    async def main():
+        cache = StaleWhileRevalidateCache(ttl=60)
+        fetch = Fetcher("v1")
+        results = await asyncio.gather(*(cache.get("k", fetch) for _ in range(5)))
+        assert results == ["v1"] * 5
+        assert fetch.calls == 1
+
+    asyncio.run(main())
+
+def test_store_survives_a_new_cache(clock, tmp_path):
+    async def main():
+        path = str(tmp_path / "cache.db")
+        first = StaleWhileRevalidateCache(ttl=60, stale_ttl=300, store=SQLiteStore(path, table="flights"))
+        await first.get("k", Fetcher({"price": 1}))
+        second = StaleWhileRevalidateCache(ttl=60, stale_ttl=300, store=SQLiteStore(path, table="flights"))
+        fetch = Fetcher({"price": 2})
+        assert await second.get("k", fetch) == {"price": 1}
+        assert fetch.calls == 0
+        # Entries older than ttl + stale_ttl are not loaded from the store
+        clock.now += 361
+        third = StaleWhileRevalidateCache(ttl=60, stale_ttl=300, store=SQLiteStore(path, table="flights"))
+        assert await third.get("k", fetch) == {"price": 2}
+
+    asyncio.run(main())
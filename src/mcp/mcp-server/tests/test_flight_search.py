@@ -0,0 +1,83 @@
+from tools.flight_search_tool import Itinerary, parse_itinerary, render_table, search_key, select_itineraries
+
+def itinerary(name, price, duration, layovers=(), emissions=100.0):
+    return Itinerary(
+        airlines=[name],
+        route=["JFK→LHR"],
+        times=["08:00→20:00"],
+        total_duration=duration,
+        layovers=list(layovers),
+        price=price,
+        emissions_kg=emissions,
+    )
+
+# Listed in Google Flights' "best" order
+ITINERARIES = [
+    itinerary("A", 500, 420, emissions=300),
+    itinerary("B", 300, 600, ["DUB"], emissions=250),
+    itinerary("C", None, 480, emissions=200),
+    itinerary("D", 250, 720, ["DUB", "KEF"], emissions=400),
+    itinerary("E", 800, 400, emissions=350),
+]
+
+def names(itineraries):
+    return [i.airlines[0] for i in itineraries]
+
+def test_defaults_keep_best_order():
+    assert names(select_itineraries(ITINERARIES)) == ["A", "B", "C", "D", "E"]
+
+def test_sort_by_price_puts_missing_prices_last():
+    assert names(select_itineraries(ITINERARIES, sort_by="price")) == ["D", "B", "A", "E", "C"]
+
+def test_sort_by_duration_stops_and_emissions():
+    assert names(select_itineraries(ITINERARIES, sort_by="duration")) == ["E", "A", "C", "B", "D"]
+    assert names(select_itineraries(ITINERARIES, sort_by="stops")) == ["E", "A", "C", "B", "D"]
+    assert names(select_itineraries(ITINERARIES, sort_by="emissions")) == ["C", "B", "A", "E", "D"]
+
+def test_max_price_drops_itineraries_without_price():
+    assert names(select_itineraries(ITINERARIES, max_price=500)) == ["A", "B", "D"]
+
+def test_max_stops():
+    assert names(select_itineraries(ITINERARIES, max_stops=0)) == ["A", "C", "E"]
+    assert names(select_itineraries(ITINERARIES, max_stops=1)) == ["A", "B", "C", "E"]
+
+def test_top_k_applies_after_filter_and_sort():
+    assert names(select_itineraries(ITINERARIES, top_k=2)) == ["A", "B"]
+    assert names(select_itineraries(ITINERARIES, sort_by="price", top_k=2)) == ["D", "B"]
+    assert names(select_itineraries(ITINERARIES, max_stops=0, sort_by="duration", top_k=2)) == ["E", "A"]
+    assert names(select_itineraries(ITINERARIES, max_price=600, max_stops=1, sort_by="price", top_k=1)) == ["B"]
+
+def test_top_k_larger_than_results_and_no_matches():
+    assert len(select_itineraries(ITINERARIES, top_k=10)) == 5
+    assert select_itineraries(ITINERARIES, max_price=100, sort_by="price", top_k=3) == []
+
+def test_parse_itinerary():
+    parsed = parse_itinerary({
+        "flights": [
+            {"airline": "X", "departure_airport": {"id": "JFK", "time": "08:00"}, "arrival_airport": {"id": "DUB", "time": "14:00"}},
+            {"airline": "X", "departure_airport": {"id": "DUB", "time": "16:00"}, "arrival_airport": {"id": "LHR", "time": "17:00"}},
+        ],
+        "layovers": [{"id": "DUB"}],
+        "total_duration": 540,
+        "carbon_emissions": {"this_flight": 412000},
+    })
+    assert parsed.airlines == ["X"]
+    assert parsed.route == ["JFK→DUB", "DUB→LHR"]
+    assert parsed.stops == 1
+    assert parsed.price is None
+    assert parsed.emissions_kg == 412.0
+
+def test_prices_keep_their_reported_form():
+    large = itinerary("K", 1250000, 600)
+    assert large.price == 1250000 and isinstance(large.price, int)
+    assert large.model_dump()["price"] == 1250000
+    assert itinerary("F", 450.5, 600).price == 450.5
+    table = render_table([large, itinerary("N", None, 600)], "KRW")
+    assert "KRW 1250000" in table
+    assert "e+" not in table
+    assert "KRW -" in table
+
+def test_search_key_normalizes_equivalent_searches():
+    assert search_key(" jfk", "lhr", "2025-06-01", currency="usd") == search_key("JFK", "LHR", "2025-06-01")
+    assert search_key("JFK", "LHR", "2025-06-01", sort_by="price") != search_key("JFK", "LHR", "2025-06-01")
+    assert search_key("JFK", "LHR", "2025-06-01", adults=2) != search_key("JFK", "LHR", "2025-06-01")
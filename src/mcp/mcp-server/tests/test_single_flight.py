@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+from fastmcp import Context
+
+from tools.single_flight import single_flight
+
+class Upstream:
+    """
+    Stands in for an upstream API: counts calls and answers once released.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, value):
+        self.calls.append(value)
+        await self.release.wait()
+        if value == "fail":
+            raise ValueError("upstream failed")
+        return f"result for {value}"
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(query: str, ctx: Context = None) -> str:
+            return await upstream(query)
+
+        callers = [asyncio.create_task(tool("weather", ctx=object())) for _ in range(5)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await asyncio.gather(*callers) == ["result for weather"] * 5
+        assert upstream.calls == ["weather"]
+        assert tool.in_flight == {}
+
+    asyncio.run(main())
+
+def test_default_key_is_exact_argument_equality():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(query: str) -> str:
+            return await upstream(query)
+
+        callers = [asyncio.create_task(tool(query)) for query in ("AbC", "abc", " ABC ", "abc")]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await asyncio.gather(*callers) == [
+            "result for AbC", "result for abc", "result for  ABC ", "result for abc",
+        ]
+        assert upstream.calls == ["AbC", "abc", " ABC "]
+
+    asyncio.run(main())
+
+def test_equal_values_of_different_types_are_not_coalesced():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(value) -> str:
+            return await upstream(value)
+
+        callers = [asyncio.create_task(tool(value)) for value in (1, True, [1, 2], [1, 2])]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        await asyncio.gather(*callers)
+        assert upstream.calls == [1, True, [1, 2]]
+
+    asyncio.run(main())
+
+def test_custom_key_coalesces_normalized_arguments():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight(key=lambda code: code.strip().upper())
+        async def tool(code: str) -> str:
+            return await upstream(code.strip().upper())
+
+        callers = [asyncio.create_task(tool(code)) for code in ("jfk", "JFK", " Jfk")]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await asyncio.gather(*callers) == ["result for JFK"] * 3
+        assert upstream.calls == ["JFK"]
+
+    asyncio.run(main())
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(query: str) -> str:
+            return await upstream(query)
+
+        first = asyncio.create_task(tool("q"))
+        second = asyncio.create_task(tool("q"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await second == "result for q"
+        assert first.cancelled()
+        assert upstream.calls == ["q"]
+
+    asyncio.run(main())
+
+def test_shared_call_finishes_when_every_caller_is_cancelled():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(query: str) -> str:
+            return await upstream(query)
+
+        callers = [asyncio.create_task(tool("q")) for _ in range(3)]
+        await asyncio.sleep(0)
+        (task,) = tool.in_flight.values()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        assert not task.done()
+        upstream.release.set()
+        assert await task == "result for q"
+        assert tool.in_flight == {}
+
+    asyncio.run(main())
+
+def test_error_reaches_every_caller_and_is_not_kept():
+    async def main():
+        upstream = Upstream()
+
+        @single_flight()
+        async def tool(query: str) -> str:
+            return await upstream(query)
+
+        callers = [asyncio.create_task(tool("fail")) for _ in range(3)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert upstream.calls == ["fail"]
+        assert tool.in_flight == {}
+        # Calls after the failure start a new upstream call
+        assert await tool("ok") == "result for ok"
+
+    asyncio.run(main())
+
+def test_sequential_calls_are_not_cached():
+    async def main():
+        upstream = Upstream()
+        upstream.release.set()
+
+        @single_flight()
+        async def tool(query: str) -> str:
+            return await upstream(query)
+
+        await tool("q")
+        await tool("q")
+        assert upstream.calls == ["q", "q"]
+
+    asyncio.run(main())
+
+def test_sync_function_is_rejected():
+    with pytest.raises(TypeError):
+        @single_flight()
+        def tool(query: str) -> str:
+            return query
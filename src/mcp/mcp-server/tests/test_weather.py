@@ -0,0 +1,26 @@
+import asyncio
+import importlib
+
+from tools.cache import SQLiteStore, TTLCache
+
+weather_module = importlib.import_module("tools.weather_tool")
+
+def test_geocoded_coordinates_are_stored(monkeypatch, tmp_path):
+    store = SQLiteStore(str(tmp_path / "geocode.db"), table="geocode")
+    monkeypatch.setattr(weather_module, "geocode_store", store)
+    monkeypatch.setattr(weather_module, "geocode_cache", TTLCache(maxsize=16))
+    tool = weather_module.OpenMetoTool(client=None)
+    calls = []
+
+    async def fetch_coordinates(city_name):
+        calls.append(city_name)
+        return "52.52", "13.40"
+
+    monkeypatch.setattr(tool, "fetch_coordinates", fetch_coordinates)
+    assert asyncio.run(tool.get_coordinates("Berlin")) == ("52.52", "13.40")
+    assert store.get("berlin") == ["52.52", "13.40"]
+
+    # A fresh in-memory cache is filled from the store, without a Nominatim request
+    monkeypatch.setattr(weather_module, "geocode_cache", TTLCache(maxsize=16))
+    assert asyncio.run(tool.get_coordinates("  BERLIN ")) == ("52.52", "13.40")
+    assert calls == ["Berlin"]
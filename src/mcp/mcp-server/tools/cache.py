@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import anyio
+
+# The server speaks JSON-RPC over stdout with the stdio transport, so nothing here may print
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache. Entries expire after `ttl` seconds, or never if ttl is None.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value, or None on a miss or once it expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteStore:
+    """
+    Small persistent key/value store in a SQLite file; values are stored as JSON.
+    Lets caches survive restarts and be shared by several server processes.
+    """
+
+    def __init__(self, path, table="cache"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL;")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, max_age=None):
+        """
+        Returns the stored value, or None if missing or older than max_age seconds.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, updated_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if max_age is not None and row[1] < time.time() - max_age:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class StaleWhileRevalidateCache:
+    """
+    Async cache of fetched values. A value is fresh for `ttl` seconds; for `stale_ttl` seconds
+    after that it is still returned, while a background task fetches a new one. Concurrent
+    fetches of the same key share one task.
+
+    Entries live in memory and, with a `store` (SQLiteStore), on disk as well, so a restarted
+    server starts warm. Keys must be strings.
+    """
+
+    def __init__(self, ttl, stale_ttl=0, maxsize=1024, store=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.store = store
+        self._memory = TTLCache(maxsize=maxsize)
+        self._fetching = {}
+
+    def _load(self, key):
+        entry = self._memory.get(key)
+        if entry is None and self.store is not None:
+            entry = self.store.get(key, max_age=self.ttl + self.stale_ttl)
+            if entry is not None:
+                self._memory.set(key, entry)
+        return entry
+
+    async def _fetch(self, key, fetch):
+        value = await fetch()
+        entry = {"fetched_at": time.time(), "value": value}
+        self._memory.set(key, entry)
+        if self.store is not None:
+            # The SQLite write and commit run off the event loop
+            await anyio.to_thread.run_sync(self.store.set, key, entry)
+        return value
+
+    def _fetch_task(self, key, fetch):
+        task = self._fetching.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._fetching[key] = task
+
+            def done(task):
+                self._fetching.pop(key, None)
+                if not task.cancelled() and task.exception() is not None:
+                    logger.warning("Fetching cache entry %r failed: %s", key, task.exception())
+
+            task.add_done_callback(done)
+        return task
+
+    async def get(self, key, fetch):
+        """
+        Returns the cached value for key, calling the coroutine function `fetch` when there is
+        none or it is too old. Stale values trigger a background refresh and are returned as is.
+        """
+        entry = self._load(key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl:
+                return entry["value"]
+            if age < self.ttl + self.stale_ttl:
+                self._fetch_task(key, fetch)
+                return entry["value"]
+        return await asyncio.shield(self._fetch_task(key, fetch))
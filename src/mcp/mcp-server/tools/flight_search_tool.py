@@ -1,34 +1,133 @@
 from mcp_server import mcp
-from serpapi import GoogleSearch
 import os
+from typing import Annotated, List, Literal, Optional, Union
+from fastmcp import Context
+from pydantic import BaseModel, Field, computed_field
 from tabulate import tabulate
+from .cache import SQLiteStore, StaleWhileRevalidateCache
+from .http_client import retry_request, shared_client
+from .single_flight import single_flight
+
+SERPAPI_SEARCH_URL = "https://serpapi.com/search.json"
+
+# Parsed itineraries per (departure, arrival, date, adults, currency): fresh for FLIGHT_CACHE_TTL
+# seconds, then served for FLIGHT_CACHE_STALE_TTL more seconds while being refreshed.
+FLIGHT_CACHE_TTL = float(os.getenv("FLIGHT_CACHE_TTL", "900"))
+FLIGHT_CACHE_STALE_TTL = float(os.getenv("FLIGHT_CACHE_STALE_TTL", "3600"))
+FLIGHT_CACHE_SIZE = int(os.getenv("FLIGHT_CACHE_SIZE", "512"))
+# Optional SQLite file that keeps the cache across restarts; in memory only when unset.
+# Use a path only this server's user can write, e.g. under its home directory.
+FLIGHT_CACHE_PATH = os.getenv("FLIGHT_CACHE_PATH")
+
+flight_cache = StaleWhileRevalidateCache(
+    ttl=FLIGHT_CACHE_TTL,
+    stale_ttl=FLIGHT_CACHE_STALE_TTL,
+    maxsize=FLIGHT_CACHE_SIZE,
+    store=SQLiteStore(FLIGHT_CACHE_PATH, table="flights") if FLIGHT_CACHE_PATH else None,
+)
+
+class Itinerary(BaseModel):
+    """
+    One itinerary of a flight search: what the flight cache keeps and records mode returns.
+    """
+    airlines: List[str]
+    route: List[str]
+    times: List[str]
+    total_duration: int
+    layovers: List[str]
+    # As SerpAPI reports it, so integer fares stay integers
+    price: Optional[Union[int, float]] = None
+    emissions_kg: float
+
+    @computed_field
+    @property
+    def stops(self) -> int:
+        return len(self.layovers)
+
+SORT_KEYS = {
+    "price": lambda itinerary: (itinerary.price is None, itinerary.price or 0),
+    "duration": lambda itinerary: itinerary.total_duration,
+    "stops": lambda itinerary: (itinerary.stops, itinerary.total_duration),
+    "emissions": lambda itinerary: itinerary.emissions_kg,
+}
+
+def search_key(departure_id, arrival_id, outbound_date, adults=1, currency="USD", **selection):
+    # The tool normalizes these before searching, so e.g. "jfk" and "JFK" give the same result
+    return (
+        departure_id.strip().upper(),
+        arrival_id.strip().upper(),
+        outbound_date.strip(),
+        adults,
+        currency.strip().upper(),
+        tuple(sorted(selection.items())),
+    )
 
 def minutes_to_hours_minutes(minutes):
     hours = minutes // 60
     mins = minutes % 60
     return f"{hours}h {mins}m"
 
-@mcp.tool()
-def get_flight_search_results(
-        departure_id: str,
-        arrival_id: str,
-        outbound_date: str,
-        adults:int = 1,
-        currency: str= "USD"
-    ) -> str:
+def parse_itinerary(itinerary):
     """
-    Fetch flight search results from Google Flights using SerpAPI.
-    
-    Args:
-        departure_id (str): Departure airport code.
-        arrival_id (str): Arrival airport code.
-        outbound_date (str): Date of departure in YYYY-MM-DD format.
-        adults (int): Number of adults traveling.
-        currency (str): Currency for the flight prices.
-        
-    Returns:
-        str: Flight search results in a table format.
+    Keeps the fields of a SerpAPI itinerary that the tool reports.
+    """
+    flights = itinerary["flights"]
+    return Itinerary(
+        airlines=list(dict.fromkeys(flight["airline"] for flight in flights)),
+        route=[f"{flight['departure_airport']['id']}→{flight['arrival_airport']['id']}" for flight in flights],
+        times=[f"{flight['departure_airport']['time']}→{flight['arrival_airport']['time']}" for flight in flights],
+        total_duration=itinerary.get("total_duration", 0),
+        layovers=[lay["id"] for lay in itinerary.get("layovers", [])],
+        price=itinerary.get("price"),
+        emissions_kg=round(itinerary.get("carbon_emissions", {}).get("this_flight", 0) / 1000, 1),  # g to kg
+    )
+
+def select_itineraries(itineraries, max_price=None, max_stops=None, sort_by="best", top_k=None):
+    """
+    Filters, sorts and truncates itineraries before they are rendered.
+    sort_by="best" keeps Google Flights' ranking.
     """
+    if max_price is not None:
+        itineraries = [i for i in itineraries if i.price is not None and i.price <= max_price]
+    if max_stops is not None:
+        itineraries = [i for i in itineraries if i.stops <= max_stops]
+    if sort_by in SORT_KEYS:
+        itineraries = sorted(itineraries, key=SORT_KEYS[sort_by])
+    if top_k is not None:
+        itineraries = itineraries[:top_k]
+    return itineraries
+
+def render_table(itineraries, currency):
+    # Prepare rows for markdown table
+    table_rows = []
+    for itinerary in itineraries:
+        price = itinerary.price if itinerary.price is not None else "-"
+        row = [
+            ", ".join(itinerary.airlines),
+            " → ".join(itinerary.route),
+            " → ".join(itinerary.times),
+            minutes_to_hours_minutes(itinerary.total_duration),
+            ", ".join(itinerary.layovers) if itinerary.layovers else "Non-stop",
+            f"{currency} {price}",
+            f"{itinerary.emissions_kg:.0f} kg"
+        ]
+        table_rows.append(row)
+
+    # Define headers
+    headers = [
+        "Airline(s)",
+        "Route",
+        "Time",
+        "Total Duration",
+        "Layovers",
+        "Price",
+        "CO₂ Emissions"
+    ]
+
+    # Output Markdown table
+    return tabulate(table_rows, headers=headers, tablefmt="github")
+
+async def fetch_itineraries(client, departure_id, arrival_id, outbound_date, adults, currency):
     params = {
         "engine": "google_flights",
         "hl": "en",
@@ -43,62 +142,64 @@ def get_flight_search_results(
         "travel_class": "1",
         "api_key": str(os.getenv("SERP_API_KEY"))
     }
+    response = await retry_request(client, "GET", SERPAPI_SEARCH_URL, params=params)
+    data = response.json()
+    if "error" in data:
+        raise Exception(data["error"])
+    # Combine best and other flights
+    flights_data = data.get("best_flights", []) + data.get("other_flights", [])
+    # Cached as plain JSON values
+    return [parse_itinerary(itinerary).model_dump() for itinerary in flights_data]
 
-    try:
-        search = GoogleSearch(params)
-        data = search.get_dict()
-        # Combine best and other flights
-        flights_data = data["best_flights"] + data["other_flights"]
-
-        # Prepare rows for markdown table
-        table_rows = []
-        for itinerary in flights_data:
-            flights = itinerary["flights"]
-            route_parts = []
-            time_parts = []
-            airlines = set()
-            delayed = False
-            
-            for flight in flights:
-                dep = flight["departure_airport"]["id"]
-                arr = flight["arrival_airport"]["id"]
-                dt = flight["departure_airport"]["time"]
-                at = flight["arrival_airport"]["time"]
-                airline = flight["airline"]
-                airlines.add(airline)
-                # delayed |= flight.get("often_delayed_by_over_30_min", False)
-                route_parts.append(f"{dep}→{arr}")
-                time_parts.append(f"{dt}→{at}")
-            
-            layovers = [lay["id"] for lay in itinerary.get("layovers", [])]
-            duration_min = itinerary.get("total_duration", 0)
-            duration_str = minutes_to_hours_minutes(duration_min)
-            emissions = itinerary.get("carbon_emissions", {}).get("this_flight", 0) / 1000  # g to kg
-            row = [
-                ", ".join(airlines),
-                " → ".join(route_parts),
-                " → ".join(time_parts),
-                duration_str,
-                ", ".join(layovers) if layovers else "Non-stop",
-                f"{currency} {itinerary.get('price', '-')}",
-                f"{emissions:.0f} kg"
-                # "Yes" if delayed else "No"
-            ]
-            table_rows.append(row)
-
-        # Define headers
-        headers = [
-            "Airline(s)",
-            "Route",
-            "Time",
-            "Total Duration",
-            "Layovers",
-            "Price",
-            "CO₂ Emissions"
-            # "Flight gets delayed"
-        ]
+@mcp.tool()
+@single_flight(key=search_key)
+async def get_flight_search_results(
+        departure_id: str,
+        arrival_id: str,
+        outbound_date: str,
+        ctx: Context,
+        adults:int = 1,
+        currency: str= "USD",
+        max_price: Annotated[Optional[float], Field(ge=0)] = None,
+        max_stops: Annotated[Optional[int], Field(ge=0)] = None,
+        sort_by: Literal["best", "price", "duration", "stops", "emissions"] = "best",
+        top_k: Annotated[Optional[int], Field(ge=1)] = None,
+        output_format: Literal["table", "records"] = "table"
+    ) -> Union[str, List[Itinerary]]:
+    """
+    Fetch flight search results from Google Flights using SerpAPI.
+    Use the filters, sort_by and top_k to get only the flights you need, e.g. the 3 cheapest non-stop flights.
 
-        # Output Markdown table
-        return tabulate(table_rows, headers=headers, tablefmt="github")
+    Args:
+        departure_id (str): Departure airport code.
+        arrival_id (str): Arrival airport code.
+        outbound_date (str): Date of departure in YYYY-MM-DD format.
+        adults (int): Number of adults traveling.
+        currency (str): Currency for the flight prices.
+        max_price (float): Only flights costing at most this much, in the given currency.
+        max_stops (int): Only flights with at most this many stops; 0 for non-stop.
+        sort_by (str): "best" (Google Flights ranking), "price", "duration", "stops" or "emissions".
+        top_k (int): Return at most this many flights.
+        output_format (str): "table" for a Markdown table, "records" for a compact list of typed records.
+
+    Returns:
+        str | list: Flight search results in a table format, or as records.
+    """
+    departure_id = departure_id.strip().upper()
+    arrival_id = arrival_id.strip().upper()
+    outbound_date = outbound_date.strip()
+    currency = currency.strip().upper()
+    client = shared_client(ctx)
+
+    async def fetch():
+        return await fetch_itineraries(client, departure_id, arrival_id, outbound_date, adults, currency)
+
+    try:
+        key = f"{departure_id}|{arrival_id}|{outbound_date}|{adults}|{currency}"
+        itineraries = [Itinerary.model_validate(itinerary) for itinerary in await flight_cache.get(key, fetch)]
+        itineraries = select_itineraries(itineraries, max_price, max_stops, sort_by, top_k)
+        if output_format == "records":
+            return itineraries
+        return render_table(itineraries, currency)
     except Exception as e:
-        return f"Error fetching flight search results: {e}"
\ No newline at end of file
+        return f"Error fetching flight search results: {e}"
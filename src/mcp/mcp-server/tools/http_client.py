@@ -0,0 +1,58 @@
+import asyncio
+import os
+import httpx
+from fastmcp import Context
+
+# (connect, read) timeouts in seconds, and retries for connection errors and 429/5xx responses
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+# Upper bound on the wait between attempts, whatever Retry-After a server sends
+HTTP_RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "10"))
+USER_AGENT = "MyWeatherApp/1.0 (Geocoding and Weather Service)"
+
+def create_http_client():
+    """
+    Keep-alive async HTTP client shared by all tool calls; created in the server lifespan.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=20),
+        headers={"User-Agent": USER_AGENT},
+        # Retries failed connection attempts; retry_request below covers retryable responses
+        transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES),
+    )
+
+def shared_client(ctx: Context) -> httpx.AsyncClient:
+    return ctx.request_context.lifespan_context["http"]
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = float(retry_after)
+    else:
+        delay = RETRY_BACKOFF * 2 ** attempt
+    return min(delay, HTTP_RETRY_MAX_DELAY)
+
+async def retry_request(client, method, url, throttle=None, **kwargs):
+    """
+    Sends a request, retrying timeouts and 429/5xx responses with exponential backoff
+    (or the server's Retry-After, capped at HTTP_RETRY_MAX_DELAY). Returns the last response.
+    throttle, if given, is awaited before every attempt, e.g. a rate limiter's wait.
+    """
+    for attempt in range(HTTP_RETRIES + 1):
+        last_attempt = attempt == HTTP_RETRIES
+        if throttle is not None:
+            await throttle()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            if last_attempt:
+                raise
+            response = None
+        if response is not None and (response.status_code not in RETRY_STATUSES or last_attempt):
+            return response
+        await asyncio.sleep(_retry_delay(response, attempt))
@@ -1,8 +1,15 @@
 from mcp_server import mcp
-from tavily import TavilyClient
+import os
+from typing import Union
+from fastmcp import Context
+from .http_client import retry_request, shared_client
+from .single_flight import single_flight
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
 
 @mcp.tool()
-def search_tool(query: str) -> str:
+@single_flight()
+async def search_tool(query: str, ctx: Context) -> Union[dict, str]:
     """
     Search the web for relevant information using Tavily Search.
 
@@ -14,9 +21,18 @@ def search_tool(query: str) -> str:
     """
     try:
         # NOTE: You need to set the TAVILY_API_KEY environment variable to use this tool.
-        tavily_client = TavilyClient()
-        response = tavily_client.search(query=query, max_results=5, include_answer=True)
-        return response
+        api_key = os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise ValueError("TAVILY_API_KEY is not set.")
+        response = await retry_request(
+            shared_client(ctx),
+            "POST",
+            TAVILY_SEARCH_URL,
+            json={"query": query, "max_results": 5, "include_answer": True},
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        response.raise_for_status()
+        return response.json()
     except Exception as e:
         # Log the exception or handle it as needed
-        return f"An error occurred while while invoking the tool Tavily search tool. Here is the logs, try to analyze it and retry invoking the tool possibly with different payload. Logs: {str(e)}"
\ No newline at end of file
+        return f"An error occurred while while invoking the tool Tavily search tool. Here is the logs, try to analyze it and retry invoking the tool possibly with different payload. Logs: {str(e)}"
@@ -0,0 +1,65 @@
+import asyncio
+import functools
+import inspect
+from fastmcp import Context
+
+def _hashable(value):
+    # Lists and dicts become tuples so arguments can be used as a dict key. Values are not
+    # changed, and their type is kept so that e.g. 1 and True stay different keys.
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return (type(value), value)
+
+def single_flight(key=None):
+    """
+    Coalesces concurrent calls of an async tool: while a call is in flight, identical calls
+    await its result instead of starting their own upstream request.
+
+    By default calls are identical when all their arguments other than the Context are equal.
+    Pass key=callable(**arguments) to build the key yourself, e.g. to also coalesce arguments
+    that differ only in case, when the tool's result does not depend on it. The shared call runs
+    as its own task, so a caller that is cancelled does not cancel it for the others.
+
+        @mcp.tool()
+        @single_flight()
+        async def weather_tool(city_name: str, ctx: Context) -> str: ...
+    """
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"single_flight needs an async function, got {func.__name__}")
+        signature = inspect.signature(func)
+        context_params = {
+            name for name, param in signature.parameters.items() if param.annotation is Context
+        }
+        in_flight = {}
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name not in context_params}
+            if key is not None:
+                return key(**arguments)
+            return tuple(sorted((name, _hashable(value)) for name, value in arguments.items()))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            call_key = make_key(args, kwargs)
+            task = in_flight.get(call_key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                in_flight[call_key] = task
+
+                def done(task):
+                    in_flight.pop(call_key, None)
+                    # Marks the error as retrieved even if every caller was cancelled
+                    if not task.cancelled():
+                        task.exception()
+
+                task.add_done_callback(done)
+            return await asyncio.shield(task)
+
+        wrapper.in_flight = in_flight
+        return wrapper
+    return decorator
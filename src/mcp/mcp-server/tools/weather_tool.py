@@ -1,16 +1,64 @@
 from mcp_server import mcp
-import requests
-from urllib.parse import quote
+import asyncio
+import os
+import time
+import anyio
+from fastmcp import Context
+from .cache import SQLiteStore, TTLCache
+from .http_client import retry_request, shared_client
+from .single_flight import single_flight
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+# City -> coordinates: in memory, plus an optional SQLite file that survives restarts
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "1024"))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")
+# Open-Meteo refreshes current weather every 15 minutes
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+
+class RateLimiter:
+    """
+    Spaces calls at least `interval` seconds apart, without blocking the event loop.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+
+    async def wait(self):
+        # Reserve a slot before sleeping, so concurrent callers queue up in order
+        now = time.monotonic()
+        delay = self._next - now
+        self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def city_key(city_name):
+    return " ".join(city_name.split()).casefold()
+
+# Shared by all calls, so cached lookups are reused
+geocode_cache = TTLCache(maxsize=GEOCODE_CACHE_SIZE)
+geocode_store = SQLiteStore(GEOCODE_CACHE_PATH, table="geocode") if GEOCODE_CACHE_PATH else None
+weather_cache = TTLCache(maxsize=GEOCODE_CACHE_SIZE, ttl=WEATHER_CACHE_TTL)
+nominatim_limiter = RateLimiter(NOMINATIM_MIN_INTERVAL)
 
 class OpenMetoTool:
 
-    def get_coordinates(self, city_name):
-        encoded_city_name = quote(city_name)
-        geocode_url = f"https://nominatim.openstreetmap.org/search?q={encoded_city_name}&format=json"
-        headers = {
-            'User-Agent': 'MyWeatherApp/1.0 (Geocoding and Weather Service)'
-        }
-        response = requests.get(geocode_url, headers=headers)
+    def __init__(self, client):
+        self.client = client
+
+    async def fetch_coordinates(self, city_name):
+        # Every attempt, retries included, goes through the limiter
+        response = await retry_request(
+            self.client,
+            "GET",
+            NOMINATIM_URL,
+            throttle=nominatim_limiter.wait,
+            params={"q": city_name, "format": "json", "limit": 1},
+        )
         if response.status_code == 200:
             data = response.json()
             if data:
@@ -25,30 +73,58 @@ class OpenMetoTool:
         else:
             raise Exception(f"Nominatim API returned an error: {response.status_code}")
 
-    def get_weather(self, city_name):
-        try:
-            lat, lon = self.get_coordinates(city_name)
-            weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-            weather_response = requests.get(weather_url)
-            if weather_response.status_code == 200:
-                weather_data = weather_response.json()
-                current_weather = weather_data.get('current_weather')
-
-                if current_weather:
-                    response = f"Current temperature in {city_name} is {current_weather['temperature']}°C, with wind speed of {current_weather['windspeed']} m/s and it is { 'day' if current_weather['is_day'] == 1 else 'night'} time."
-                    return response
-                else:
-                    raise Exception("Weather data not available.")
+    async def get_coordinates(self, city_name):
+        key = city_key(city_name)
+        coordinates = geocode_cache.get(key)
+        if coordinates is None and geocode_store is not None:
+            # Local point lookup; quick enough to run on the event loop
+            stored = geocode_store.get(key)
+            if stored is not None:
+                coordinates = tuple(stored)
+                geocode_cache.set(key, coordinates)
+        if coordinates is None:
+            coordinates = await self.fetch_coordinates(city_name)
+            geocode_cache.set(key, coordinates)
+            if geocode_store is not None:
+                # The INSERT and commit wait on the disk, so they run in a worker thread
+                await anyio.to_thread.run_sync(geocode_store.set, key, list(coordinates))
+        return coordinates
+
+    async def get_current_weather(self, lat, lon):
+        current_weather = weather_cache.get((lat, lon))
+        if current_weather is not None:
+            return current_weather
+        weather_response = await retry_request(
+            self.client,
+            "GET",
+            OPEN_METEO_URL,
+            params={"latitude": lat, "longitude": lon, "current_weather": "true"},
+        )
+        if weather_response.status_code == 200:
+            current_weather = weather_response.json().get('current_weather')
+            if current_weather:
+                weather_cache.set((lat, lon), current_weather)
+                return current_weather
             else:
-                raise Exception(f"Open-Meteo API returned an error: {weather_response.status_code}")
+                raise Exception("Weather data not available.")
+        else:
+            raise Exception(f"Open-Meteo API returned an error: {weather_response.status_code}")
+
+    async def get_weather(self, city_name):
+        try:
+            lat, lon = await self.get_coordinates(city_name)
+            current_weather = await self.get_current_weather(lat, lon)
+            response = f"Current temperature in {city_name} is {current_weather['temperature']}°C, with wind speed of {current_weather['windspeed']} m/s and it is { 'day' if current_weather['is_day'] == 1 else 'night'} time."
+            return response
         except Exception as e:
-            return str(e) 
-        
-    def weather_tool(self, city_name: str) -> str:
-        return self.get_weather(city_name)
-    
+            return str(e)
+
+    async def weather_tool(self, city_name: str) -> str:
+        return await self.get_weather(city_name)
+
 @mcp.tool()
-def weather_tool(city_name: str) -> str:
+@single_flight()
+async def weather_tool(city_name: str, ctx: Context) -> str:
     """
     Retrieve weather information for a given city using the Open-Meteo API.
 
@@ -57,13 +133,13 @@ def weather_tool(city_name: str) -> str:
 
     Returns:
         str: A string containing the weather information for the specified city.
-    
+
     Example:
         city_name = "New York"
     """
     try:
-        open_meto = OpenMetoTool()
-        return open_meto.weather_tool(city_name)
+        open_meto = OpenMetoTool(shared_client(ctx))
+        return await open_meto.weather_tool(city_name)
     except Exception as e:
         # Log the exception or handle it as needed
-        return f"An error occurred while while invoking the tool weather tool. Here is the logs, try to analyze it and retry invoking the tool possibly with different payload. Logs: {str(e)}"
\ No newline at end of file
+        return f"An error occurred while while invoking the tool weather tool. Here is the logs, try to analyze it and retry invoking the tool possibly with different payload. Logs: {str(e)}"